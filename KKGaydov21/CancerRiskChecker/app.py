@@ -2,11 +2,9 @@ import os
 from flask_login import LoginManager
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
-from flask import Flask
+from flask import Flask, request
 from flask_sqlalchemy import SQLAlchemy
 
-app = Flask(__name__)
-
 
 class Base(DeclarativeBase):
     pass
@@ -22,10 +20,22 @@ app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
 # configure the database
 app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///cancer_assessment.db")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+if app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+    # SQLite is a local file, so there is nothing to size; just allow cross-thread use
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_pre_ping": True,
+        "connect_args": {"check_same_thread": False},
+    }
+else:
+    # Keep gunicorn workers x (pool_size + max_overflow) below the server's max_connections
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_size": 20,
+        "max_overflow": 20,
+        "pool_timeout": 5,
+        "pool_recycle": 300,
+        "pool_pre_ping": True,
+        "pool_use_lifo": True,
+    }
 
 # initialize extensions
 db.init_app(app)
@@ -42,8 +52,13 @@ with app.app_context():
 # User loader for Flask-Login
 @login_manager.user_loader
 def load_user(user_id):
+    if request.path.startswith('/static'):
+        return None
+
+    # Always read the row: is_active/is_admin must reflect changes made
+    # by any worker, and the counters are updated with bulk UPDATEs
     from models import User
-    return User.query.get(int(user_id))
+    return db.session.get(User, int(user_id))
 
 # Register blueprints
 from auth import auth_bp
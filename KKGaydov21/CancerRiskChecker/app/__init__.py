@@ -2,7 +2,12 @@
 Application factory and initialization
 """
 import os
-from flask import Flask
+import atexit
+import logging
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from flask import Flask, g, request
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from sqlalchemy.orm import DeclarativeBase
@@ -19,6 +24,31 @@ app = Flask(__name__)
 db = SQLAlchemy(model_class=Base)
 login_manager = LoginManager()
 
+_log_listener = None
+
+
+def configure_logging():
+    """Send package log records through a queue to a background writer thread.
+
+    Request threads only enqueue the record; formatting and the write to
+    stderr happen on the listener thread.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return
+    
+    sink = logging.StreamHandler()
+    sink.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    log_queue = queue.SimpleQueue()
+    _log_listener = QueueListener(log_queue, sink)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    
+    package_logger = logging.getLogger(__name__.rpartition('.')[0])
+    package_logger.addHandler(QueueHandler(log_queue))
+    package_logger.setLevel(logging.INFO)
+    package_logger.propagate = False
+
 
 def create_app(config_name=None):
     """Application factory pattern."""
@@ -33,6 +63,8 @@ def create_app(config_name=None):
     config_class = get_config()
     app.config.from_object(config_class)
     
+    configure_logging()
+    
     # Initialize extensions
     db.init_app(app)
     login_manager.init_app(app)
@@ -60,15 +92,31 @@ def create_app(config_name=None):
     app.register_blueprint(api_bp, url_prefix='/api')
     app.register_blueprint(admin_bp, url_prefix='/admin')
     
+    # One clock read per request, shared by every "last N days" window
+    @app.before_request
+    def set_request_time():
+        g.now = datetime.now(timezone.utc).replace(tzinfo=None)
+    
     # User loader for Flask-Login
     @login_manager.user_loader
     def load_user(user_id):
+        if request.path.startswith('/static'):
+            return None
+        
+        # Always read the row: is_active/is_admin must reflect changes made
+        # by any worker, and the counters are updated with bulk UPDATEs
         from ..models.user import User
-        return User.query.get(int(user_id))
+        return db.session.get(User, int(user_id))
     
     # Create database tables
     with app.app_context():
-        from ..models import user, assessment  # Import models
+        from ..models import user, assessment, platform_stats  # Import models
         db.create_all()
+        platform_stats.PlatformStats.ensure_row()
+    
+    # Load the model at startup rather than on the first prediction request
+    if not app.testing:
+        from ..utils.ml_engine import cancer_predictor
+        cancer_predictor.warm_up()
     
     return app
\ No newline at end of file
@@ -1,261 +1,366 @@
-import uuid
-import os
-import sys
-import json
-import pandas as pd
-import numpy as np
-import plotly
-import plotly.utils
-import plotly.graph_objects as go
-from flask import Flask
-app = Flask(__name__)
-from routes.auth_routes import auth_bp
-
-app.register_blueprint(auth_bp, url_prefix='/auth')
-
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
-from flask_cors import CORS
-app.secret_key = 'KKGaydov21_SECRET'
-
-# Add current directory to sys.path so relative imports work
-sys.path.append('.')
-
-# Import your database and route modules
-from data.database import (
-    create_tables,
-    save_survey_response,
-    get_user_history,
-    get_assessment_statistics,
-    get_recent_assessments
-)
-from routes.auth_routes import auth_bp
-from routes.assessment_routes import assessment_bp
-
-# Import your logistic regression model and preprocessing utilities
-from models.logistic_regression import LogisticRegression
-from data.utils import load_and_preprocess_data
-
-app = Flask(__name__)
-app.secret_key = 'cancer_risk_assessment_secret_key_2024'
-CORS(app)
-
-# Register blueprints
-app.register_blueprint(auth_bp)
-app.register_blueprint(assessment_bp)
-
-# Initialize database tables
-create_tables()
-
-
-def load_trained_model():
-    """Load the trained logistic regression model and scaler, or train a new one if not found."""
-    try:
-        if os.path.exists('models/trained_model.pkl') and os.path.exists('models/scaler.pkl'):
-            import pickle
-            with open('models/trained_model.pkl', 'rb') as f:
-                model = pickle.load(f)
-            with open('models/scaler.pkl', 'rb') as f:
-                scaler = pickle.load(f)
-            return model, scaler
-        else:
-            print("Training new model...")
-            data = pd.read_csv('attached_assets/Cancer_Data_1750145449492.csv')
-            X, y, feature_names, scaler = load_and_preprocess_data(data)
-
-            model = LogisticRegression(learning_rate=0.01, max_iterations=1000, tolerance=1e-6)
-            loss_history = model.fit(X, y)
-
-            # Save model and scaler for future use
-            os.makedirs('models', exist_ok=True)
-            import pickle
-            with open('models/trained_model.pkl', 'wb') as f:
-                pickle.dump(model, f)
-            with open('models/scaler.pkl', 'wb') as f:
-                pickle.dump(scaler, f)
-
-            return model, scaler
-    except Exception as e:
-        print(f"Error loading model: {e}")
-        return None, None
-
-
-# Load the model and scaler once at startup
-model, scaler = load_trained_model()
-
-
-@app.route('/')
-def index():
-    """Main page."""
-    if 'user_id' not in session:
-        session['user_id'] = str(uuid.uuid4())
-    return render_template('index.html')
-
-
-@app.route('/predict', methods=['POST'])
-def predict():
-    """Handle prediction request from client."""
-    try:
-        data = request.get_json()
-
-        features = [
-            data.get('radius_mean', 0),
-            data.get('texture_mean', 0),
-            data.get('perimeter_mean', 0),
-            data.get('area_mean', 0),
-            data.get('smoothness_mean', 0),
-            data.get('compactness_mean', 0),
-            data.get('concavity_mean', 0),
-            data.get('concave_points_mean', 0),
-            data.get('symmetry_mean', 0),
-            data.get('fractal_dimension_mean', 0),
-            data.get('radius_se', 0),
-            data.get('texture_se', 0),
-            data.get('perimeter_se', 0),
-            data.get('area_se', 0),
-            data.get('smoothness_se', 0),
-            data.get('compactness_se', 0),
-            data.get('concavity_se', 0),
-            data.get('concave_points_se', 0),
-            data.get('symmetry_se', 0),
-            data.get('fractal_dimension_se', 0),
-            data.get('radius_worst', 0),
-            data.get('texture_worst', 0),
-            data.get('perimeter_worst', 0),
-            data.get('area_worst', 0),
-            data.get('smoothness_worst', 0),
-            data.get('compactness_worst', 0),
-            data.get('concavity_worst', 0),
-            data.get('concave_points_worst', 0),
-            data.get('symmetry_worst', 0),
-            data.get('fractal_dimension_worst', 0)
-        ]
-
-        # Check model and scaler
-        if model is None or scaler is None:
-            return jsonify({'error': 'Model not loaded properly'}), 500
-
-        # Scale input features and predict
-        input_data = np.array([features])
-        input_scaled = scaler.transform(input_data)
-
-        probability = model.predict_proba(input_scaled)[0][1]  # Probability of positive class
-        prediction = model.predict(input_scaled)[0]
-
-        # Determine risk level based on probability thresholds
-        if probability < 0.3:
-            risk_level = "Very Low"
-        elif probability < 0.5:
-            risk_level = "Low"
-        elif probability < 0.7:
-            risk_level = "Moderate"
-        else:
-            risk_level = "High"
-
-        survey_data = {f'feature_{i}': features[i] for i in range(len(features))}
-        prediction_result = {
-            'probability': probability,
-            'prediction': int(prediction),
-            'risk_level': risk_level
-        }
-
-        # Ensure user_id exists in session before saving
-        user_id = session.get('user_id')
-        if not user_id:
-            user_id = str(uuid.uuid4())
-            session['user_id'] = user_id
-
-        try:
-            survey_id = save_survey_response(survey_data, prediction_result, user_id)
-        except Exception as e:
-            survey_id = None
-            print(f"Database save error: {e}")
-
-        # Create gauge chart for the risk probability
-        fig_gauge = go.Figure(go.Indicator(
-            mode="gauge+number+delta",
-            value=probability * 100,
-            domain={'x': [0, 1], 'y': [0, 1]},
-            title={'text': "Malignancy Risk (%)", 'font': {'size': 24, 'color': '#2d3748'}},
-            delta={'reference': 50, 'increasing': {'color': "red"}, 'decreasing': {'color': "green"}},
-            gauge={
-                'axis': {'range': [None, 100], 'tickcolor': "#2d3748"},
-                'bar': {'color': "#667eea", 'thickness': 0.8},
-                'steps': [
-                    {'range': [0, 30], 'color': "#c6f6d5"},
-                    {'range': [30, 50], 'color': "#bee3f8"},
-                    {'range': [50, 70], 'color': "#fbb6ce"},
-                    {'range': [70, 100], 'color': "#fed7d7"}
-                ],
-                'threshold': {
-                    'line': {'color': "red", 'width': 4},
-                    'thickness': 0.75,
-                    'value': 50
-                }
-            }
-        ))
-
-        fig_gauge.update_layout(
-            height=400,
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font={'color': "#2d3748", 'family': "Arial"}
-        )
-
-        gauge_json = json.dumps(fig_gauge, cls=plotly.utils.PlotlyJSONEncoder)
-
-        return jsonify({
-            'probability': float(probability),
-            'prediction': int(prediction),
-            'risk_level': risk_level,
-            'survey_id': survey_id,
-            'gauge_chart': gauge_json
-        })
-
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-
-@app.route('/history')
-def history():
-    """Return user prediction history."""
-    try:
-        user_id = session.get('user_id')
-        if not user_id:
-            return jsonify([])
-
-        history = get_user_history(user_id, limit=20)
-        history_data = []
-        for assessment in history:
-            history_data.append({
-                'id': assessment.id,
-                'date': assessment.timestamp.strftime('%Y-%m-%d %H:%M'),
-                'risk_level': assessment.risk_level,
-                'probability': assessment.prediction_probability,
-                'prediction': 'Malignant' if assessment.prediction_class == 1 else 'Benign'
-            })
-        return jsonify(history_data)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-
-@app.route('/analytics')
-def analytics():
-    """Return aggregated analytics data."""
-    try:
-        stats = get_assessment_statistics()
-        recent = get_recent_assessments(limit=50)
-
-        analytics_data = {
-            'total_assessments': stats.get('total_assessments', 0),
-            'malignant_count': stats.get('malignant_count', 0),
-            'benign_count': stats.get('benign_count', 0),
-            'average_risk': stats.get('average_risk', 0),
-            'recent_assessments': len(recent) if recent else 0
-        }
-        return jsonify(analytics_data)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-
-if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+import uuid
+import os
+import math
+import time
+import sys
+import json
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from functools import lru_cache
+from cachetools import TTLCache
+import numpy as np
+from flask import Flask
+app = Flask(__name__)
+from routes.auth_routes import auth_bp
+
+app.register_blueprint(auth_bp, url_prefix='/auth')
+
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask_cors import CORS
+from flask.json.provider import DefaultJSONProvider
+import orjson
+app.secret_key = 'KKGaydov21_SECRET'
+
+# Add current directory to sys.path so relative imports work
+sys.path.append('.')
+
+# Import your database and route modules
+from data.database import (
+    create_tables,
+    save_survey_response,
+    get_user_history,
+    get_assessment_statistics,
+    get_recent_assessments
+)
+from routes.auth_routes import auth_bp
+from routes.assessment_routes import assessment_bp
+from auth import auth_manager
+
+# Import your logistic regression model and preprocessing utilities
+from models.logistic_regression import LogisticRegression
+from data.utils import load_and_preprocess_data
+
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson, which also encodes numpy values natively."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+app = Flask(__name__)
+# Match '/predict' and '/predict/' alike instead of answering with a redirect;
+# must be set before any rule is bound to the map
+app.url_map.strict_slashes = False
+app.json = ORJSONProvider(app)
+app.secret_key = 'cancer_risk_assessment_secret_key_2024'
+CORS(app)
+
+# Keep sessions server-side in Redis when it is configured, so the cookie only
+# carries a session id and all workers see the same session data
+redis_url = os.environ.get('REDIS_URL')
+if redis_url:
+    import redis
+    from flask_session import Session
+    app.config['SESSION_TYPE'] = 'redis'
+    app.config['SESSION_REDIS'] = redis.Redis.from_url(redis_url)
+    Session(app)
+
+# Register blueprints
+app.register_blueprint(auth_bp)
+app.register_blueprint(assessment_bp)
+auth_manager.init_app(app)
+
+# Initialize database tables
+create_tables()
+
+# Input order expected by the model and scaler (30 Wisconsin dataset features)
+FEATURE_NAMES = (
+    'radius_mean', 'texture_mean', 'perimeter_mean', 'area_mean',
+    'smoothness_mean', 'compactness_mean', 'concavity_mean', 'concave_points_mean',
+    'symmetry_mean', 'fractal_dimension_mean',
+    'radius_se', 'texture_se', 'perimeter_se', 'area_se',
+    'smoothness_se', 'compactness_se', 'concavity_se', 'concave_points_se',
+    'symmetry_se', 'fractal_dimension_se',
+    'radius_worst', 'texture_worst', 'perimeter_worst', 'area_worst',
+    'smoothness_worst', 'compactness_worst', 'concavity_worst', 'concave_points_worst',
+    'symmetry_worst', 'fractal_dimension_worst'
+)
+SURVEY_KEYS = tuple(f'feature_{i}' for i in range(len(FEATURE_NAMES)))
+
+# Probability cut-offs between consecutive risk levels; works on scalars and arrays
+RISK_THRESHOLDS = np.array([0.3, 0.5, 0.7])
+RISK_LEVELS = ('Very Low', 'Low', 'Moderate', 'High')
+
+
+def load_trained_model():
+    """Load the trained logistic regression model and scaler, or train a new one if not found."""
+    try:
+        if os.path.exists('models/trained_model.pkl') and os.path.exists('models/scaler.pkl'):
+            import pickle
+            with open('models/trained_model.pkl', 'rb') as f:
+                model = pickle.load(f)
+            with open('models/scaler.pkl', 'rb') as f:
+                scaler = pickle.load(f)
+            return model, scaler
+        else:
+            print("Training new model...")
+            # pandas is only needed to train, so don't pay for it on every start
+            import pandas as pd
+            data = pd.read_csv('attached_assets/Cancer_Data_1750145449492.csv')
+            X, y, feature_names, scaler = load_and_preprocess_data(data)
+
+            model = LogisticRegression(learning_rate=0.01, max_iterations=1000, tolerance=1e-6)
+            loss_history = model.fit(X, y)
+
+            # Save model and scaler for future use
+            os.makedirs('models', exist_ok=True)
+            import pickle
+            with open('models/trained_model.pkl', 'wb') as f:
+                pickle.dump(model, f)
+            with open('models/scaler.pkl', 'wb') as f:
+                pickle.dump(scaler, f)
+
+            return model, scaler
+    except Exception as e:
+        print(f"Error loading model: {e}")
+        return None, None
+
+
+def fuse_scaler_into_model(model, scaler):
+    """Fold the scaler's mean/scale into the model weights.
+
+    sigmoid(w . ((x - mu) / sigma) + b) == sigmoid((w / sigma) . x + b - w . (mu / sigma)),
+    so prediction becomes a single dot product. Returns None if either object
+    does not expose its affine parameters.
+    """
+    weights = getattr(model, 'coef_', getattr(model, 'weights', None))
+    bias = getattr(model, 'intercept_', getattr(model, 'bias', None))
+    mean = getattr(scaler, 'mean_', None)
+    scale = getattr(scaler, 'scale_', None)
+    if weights is None or bias is None or mean is None or scale is None:
+        return None
+
+    weights = np.asarray(weights, dtype=np.float64).ravel()
+    fused_weights = np.ascontiguousarray(weights / scale)
+    fused_weights.setflags(write=False)
+    fused_bias = float(np.ravel(bias)[0]) - float(np.dot(weights, mean / scale))
+    return fused_weights, fused_bias
+
+
+def sigmoid(z):
+    """Numerically stable logistic function on a plain float."""
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+# Load the model and scaler once at startup
+model, scaler = load_trained_model()
+fused_params = fuse_scaler_into_model(model, scaler) if model is not None else None
+
+
+# /analytics aggregates are reused for 30s, or until a new survey is saved
+analytics_cache = TTLCache(maxsize=1, ttl=30)
+analytics_lock = Lock()
+
+# Survey responses are written off the request thread
+survey_writer = ThreadPoolExecutor(max_workers=4)
+
+
+def save_survey_in_background(survey_data, prediction_result, user_id):
+    """Persist a survey response, logging instead of raising on failure."""
+    try:
+        save_survey_response(survey_data, prediction_result, user_id)
+    except Exception as e:
+        print(f"Database save error: {e}")
+    else:
+        with analytics_lock:
+            analytics_cache.pop('analytics', None)
+
+
+def new_session_id():
+    """Return a time-ordered UUIDv7 string for a new anonymous session.
+
+    Ids issued later sort later, so the assessments index on user_id
+    grows at its right edge instead of splitting random pages.
+    """
+    if hasattr(uuid, 'uuid7'):
+        return str(uuid.uuid7())
+    value = (time.time_ns() // 1_000_000 & 0xFFFFFFFFFFFF) << 80
+    value |= int.from_bytes(os.urandom(10), 'big')
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # version 7
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # RFC 4122 variant
+    return str(uuid.UUID(int=value))
+
+
+# Placeholder needle value, swapped for the real one in each response
+GAUGE_SENTINEL = -987654.321
+GAUGE_PLACEHOLDER = repr(GAUGE_SENTINEL)
+
+
+@lru_cache(maxsize=1)
+def get_gauge_template():
+    """Serialize the risk gauge on first use; /predict only substitutes the value."""
+    import plotly.utils
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number+delta",
+        value=GAUGE_SENTINEL,
+        domain={'x': [0, 1], 'y': [0, 1]},
+        title={'text': "Malignancy Risk (%)", 'font': {'size': 24, 'color': '#2d3748'}},
+        delta={'reference': 50, 'increasing': {'color': "red"}, 'decreasing': {'color': "green"}},
+        gauge={
+            'axis': {'range': [None, 100], 'tickcolor': "#2d3748"},
+            'bar': {'color': "#667eea", 'thickness': 0.8},
+            'steps': [
+                {'range': [0, 30], 'color': "#c6f6d5"},
+                {'range': [30, 50], 'color': "#bee3f8"},
+                {'range': [50, 70], 'color': "#fbb6ce"},
+                {'range': [70, 100], 'color': "#fed7d7"}
+            ],
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': 50
+            }
+        }
+    ))
+
+    fig.update_layout(
+        height=400,
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font={'color': "#2d3748", 'family': "Arial"}
+    )
+
+    return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+
+
+
+@app.route('/')
+def index():
+    """Main page."""
+    if 'user_id' not in session:
+        session['user_id'] = new_session_id()
+    return render_template('index.html')
+
+
+@app.route('/predict', methods=['POST'])
+def predict():
+    """Handle prediction request from client."""
+    try:
+        data = request.get_json()
+
+        features = np.fromiter(
+            (data.get(name, 0) for name in FEATURE_NAMES),
+            dtype=np.float64, count=len(FEATURE_NAMES)
+        )
+
+        # Check model and scaler
+        if model is None or scaler is None:
+            return jsonify({'error': 'Model not loaded properly'}), 500
+
+        if fused_params is not None:
+            # Scaling is folded into the weights, so this is one dot product
+            fused_weights, fused_bias = fused_params
+            probability = sigmoid(float(features @ fused_weights) + fused_bias)
+            prediction = int(probability >= 0.5)
+        else:
+            # Scale input features and predict
+            input_data = features.reshape(1, -1)
+            input_scaled = scaler.transform(input_data)
+
+            probability = model.predict_proba(input_scaled)[0][1]  # Probability of positive class
+            prediction = model.predict(input_scaled)[0]
+
+        # Determine risk level based on probability thresholds
+        risk_level = RISK_LEVELS[int(np.searchsorted(RISK_THRESHOLDS, probability, side='right'))]
+
+        survey_data = dict(zip(SURVEY_KEYS, features.tolist()))
+        prediction_result = {
+            'probability': probability,
+            'prediction': int(prediction),
+            'risk_level': risk_level
+        }
+
+        # Ensure user_id exists in session before saving
+        user_id = session.get('user_id')
+        if not user_id:
+            user_id = new_session_id()
+            session['user_id'] = user_id
+
+        # The INSERT happens on a worker thread; the response doesn't wait for it
+        survey_writer.submit(save_survey_in_background, survey_data, prediction_result, user_id)
+        survey_id = None
+
+        # Only the needle value differs between requests
+        gauge_json = get_gauge_template().replace(GAUGE_PLACEHOLDER, repr(float(probability * 100)))
+
+        return jsonify({
+            'probability': probability,
+            'prediction': prediction,
+            'risk_level': risk_level,
+            'survey_id': survey_id,
+            'gauge_chart': gauge_json
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/history')
+def history():
+    """Return user prediction history."""
+    try:
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify([])
+
+        history = get_user_history(user_id, limit=20)
+        history_data = []
+        for assessment in history:
+            history_data.append({
+                'id': assessment.id,
+                'date': assessment.timestamp.strftime('%Y-%m-%d %H:%M'),
+                'risk_level': assessment.risk_level,
+                'probability': assessment.prediction_probability,
+                'prediction': 'Malignant' if assessment.prediction_class == 1 else 'Benign'
+            })
+        return jsonify(history_data)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/analytics')
+def analytics():
+    """Return aggregated analytics data."""
+    try:
+        with analytics_lock:
+            analytics_data = analytics_cache.get('analytics')
+
+        if analytics_data is None:
+            stats = get_assessment_statistics()
+            recent = get_recent_assessments(limit=50)
+
+            analytics_data = {
+                'total_assessments': stats.get('total_assessments', 0),
+                'malignant_count': stats.get('malignant_count', 0),
+                'benign_count': stats.get('benign_count', 0),
+                'average_risk': stats.get('average_risk', 0),
+                'recent_assessments': len(recent) if recent else 0
+            }
+            with analytics_lock:
+                analytics_cache['analytics'] = analytics_data
+
+        return jsonify(analytics_data)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=5000, debug=True)
@@ -1,76 +1,111 @@
 """
 Admin blueprint for user management and platform administration
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
-from flask_login import login_required, current_user
+import logging
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, g, current_app
+from flask_login import current_user
+from flask_login.config import EXEMPT_METHODS
 from functools import wraps
-from datetime import datetime, timedelta
-from ..utils.helpers import log_user_activity
+from datetime import timedelta
+from threading import Lock
+from cachetools import TTLCache
+from sqlalchemy import select, true
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only, raiseload
+from ..app import db
+from ..models.user import User
+from ..models.assessment import Assessment
+from ..models.platform_stats import PlatformStats
+from ..forms.auth_forms import RegistrationForm
+from ..utils.helpers import log_user_activity, keyset_paginate
 
 
 admin_bp = Blueprint('admin', __name__)
+log = logging.getLogger(__name__)
+
+# The set of risk levels barely changes, so the filter dropdown re-reads it
+# at most every 5 minutes
+_risk_levels_cache = TTLCache(maxsize=1, ttl=300)
+_risk_levels_lock = Lock()
+
+# Dashboard and /api/stats aggregates, reused for 30 seconds
+_stats_cache = TTLCache(maxsize=4, ttl=30)
+_stats_lock = Lock()
 
 
 def admin_required(f):
-    """Decorator to require admin privileges."""
+    """Decorator to require a logged-in admin; also does login_required's job.
+
+    The user is resolved from the current_user proxy once and left in
+    g.admin_user for the view.
+    """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not current_user.is_authenticated or not current_user.is_admin:
+        if request.method in EXEMPT_METHODS or current_app.config.get('LOGIN_DISABLED'):
+            return f(*args, **kwargs)
+        user = current_user._get_current_object()
+        if not user.is_authenticated:
+            return current_app.login_manager.unauthorized()
+        if not user.is_admin:
             flash('Admin access required.', 'danger')
             return redirect(url_for('main.index'))
+        g.admin_user = user
         return f(*args, **kwargs)
     return decorated_function
 
 
 @admin_bp.route('/')
-@login_required
 @admin_required
 def index():
     """Admin dashboard with platform overview."""
-    from ..models.user import User
-    from ..models.assessment import Assessment
-    from ..app import db
     flash("hi")
-    # Get platform statistics
-    total_users = User.query.count()
-    active_users = User.query.filter_by(is_active=True).count()
-    admin_users = User.query.filter_by(is_admin=True).count()
-    total_assessments = Assessment.query.count()
-    
-    # Recent activity (last 30 days)
-    last_30_days = datetime.utcnow() - timedelta(days=30)
-    new_users_30d = User.query.filter(User.created_at >= last_30_days).count()
-    assessments_30d = Assessment.query.filter(Assessment.timestamp >= last_30_days).count()
-    
-    # Risk distribution across all users
-    risk_stats = db.session.query(
-        Assessment.risk_level,
-        db.func.count(Assessment.id).label('count')
-    ).group_by(Assessment.risk_level).all()
-    
-
-
-    stats = {
-        'total_users': total_users,
-        'active_users': active_users,
-        'admin_users': admin_users,
-        'total_assessments': total_assessments,
-        'new_users_30d': new_users_30d,
-        'assessments_30d': assessments_30d,
-        'risk_distribution': dict(risk_stats),
-    }
+    with _stats_lock:
+        stats = _stats_cache.get('dashboard')
+    if stats is None:
+        # Platform statistics and recent activity (last 30 days) as conditional
+        # aggregates: one scan per table and a single round trip
+        last_30_days = g.now - timedelta(days=30)
+        user_counts = select(
+            db.func.count(User.id).label('total_users'),
+            db.func.count(User.id).filter(User.is_active.is_(True)).label('active_users'),
+            db.func.count(User.id).filter(User.is_admin.is_(True)).label('admin_users'),
+            db.func.count(User.id).filter(User.created_at >= last_30_days).label('new_users_30d')
+        ).subquery()
+        assessment_counts = select(
+            db.func.count(Assessment.id).label('total_assessments'),
+            db.func.count(Assessment.id).filter(Assessment.timestamp >= last_30_days).label('assessments_30d')
+        ).subquery()
+        counts = db.session.execute(
+            select(user_counts, assessment_counts)
+            .select_from(user_counts.join(assessment_counts, true()))
+        ).one()
+    
+        # Risk distribution across all users
+        risk_stats = db.session.query(
+            Assessment.risk_level,
+            db.func.count(Assessment.id).label('count')
+        ).group_by(Assessment.risk_level).all()
+    
+        stats = {
+            'total_users': counts.total_users,
+            'active_users': counts.active_users,
+            'admin_users': counts.admin_users,
+            'total_assessments': counts.total_assessments,
+            'new_users_30d': counts.new_users_30d,
+            'assessments_30d': counts.assessments_30d,
+            'risk_distribution': dict(risk_stats),
+        }
+        with _stats_lock:
+            _stats_cache['dashboard'] = stats
     
     return render_template('admin/dashboard.html', stats=stats)
 
 
 @admin_bp.route('/users')
-@login_required
 @admin_required
 def users():
     """User management page."""
-    from ..models.user import User
-    
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor', '', type=str)
     search = request.args.get('search', '', type=str)
     status = request.args.get('status', 'all', type=str)
     
@@ -78,11 +113,7 @@ def users():
     query = User.query
     
     if search:
-        query = query.filter(
-            (User.username.contains(search)) |
-            (User.email.contains(search)) |
-            (User.full_name.contains(search))
-        )
+        query = query.filter(User.search_text().ilike(f'%{search}%'))
     
     if status == 'active':
         query = query.filter_by(is_active=True)
@@ -91,24 +122,19 @@ def users():
     elif status == 'admin':
         query = query.filter_by(is_admin=True)
     
-    users_pagination = query.order_by(User.created_at.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    users_page = keyset_paginate(query, User.created_at, User.id, cursor, per_page=20)
     
     return render_template('admin/users.html', 
-                         users=users_pagination,
+                         users=users_page,
+                         cursor=cursor,
                          search=search,
                          status=status)
 
 
 @admin_bp.route('/users/<int:user_id>')
-@login_required
 @admin_required
 def user_detail(user_id):
     """User detail page."""
-    from ..models.user import User
-    from ..models.assessment import Assessment
-    
     user = User.query.get_or_404(user_id)
     
     # Get user's recent assessments
@@ -125,14 +151,10 @@ def user_detail(user_id):
 
 
 @admin_bp.route('/users/<int:user_id>/delete', methods=['POST', 'GET'])
-@login_required
 @admin_required
 def delete_user(user_id):
     flash("Function called")
     """Delete a user account."""
-    from ..models.user import User
-    from ..app import db
-    
     if user_id == current_user.id:
         flash('You cannot delete your own account.', 'danger')
         return redirect(url_for('admin.users'))
@@ -146,28 +168,28 @@ def delete_user(user_id):
     
     try:
         username = user.username
+        # Their assessments go with them through the delete-orphan cascade
+        PlatformStats.adjust_assessments(-db.session.scalar(
+            select(db.func.count()).where(Assessment.user_id == user_id)
+        ))
         db.session.delete(user)
         db.session.commit()
         
         log_user_activity('admin_user_deleted', f'Deleted user: {username}')
         flash(f'User "{username}" has been deleted successfully.', 'success')
         
-    except Exception as e:
+    except Exception:
         db.session.rollback()
         flash('Error deleting user. Please try again.', 'danger')
-        print(f"Error deleting user: {e}")
+        log.exception("Error deleting user")
     
     return redirect(url_for('admin.users'))
 
 
 @admin_bp.route('/users/<int:user_id>/toggle-status', methods=['POST'])
-@login_required
 @admin_required
 def toggle_user_status(user_id):
     """Toggle user active status."""
-    from ..models.user import User
-    from ..app import db
-    
     if user_id == current_user.id:
         flash('You cannot deactivate your own account.', 'danger')
         return redirect(url_for('admin.users'))
@@ -183,22 +205,18 @@ def toggle_user_status(user_id):
                          f'{status.title()} user: {user.username}')
         flash(f'User "{user.username}" has been {status}.', 'success')
         
-    except Exception as e:
+    except Exception:
         db.session.rollback()
         flash('Error updating user status.', 'danger')
-        print(f"Error toggling user status: {e}")
+        log.exception("Error toggling user status")
     
     return redirect(url_for('admin.user_detail', user_id=user_id))
 
 
 @admin_bp.route('/users/<int:user_id>/make-admin', methods=['POST'])
-@login_required
 @admin_required
 def toggle_admin_status(user_id):
     """Toggle user admin status."""
-    from ..models.user import User
-    from ..app import db
-    
     user = User.query.get_or_404(user_id)
     
     try:
@@ -210,29 +228,33 @@ def toggle_admin_status(user_id):
                          f'Admin privileges {status} for user: {user.username}')
         flash(f'Admin privileges {status} for "{user.username}".', 'success')
         
-    except Exception as e:
+    except Exception:
         db.session.rollback()
         flash('Error updating admin status.', 'danger')
-        print(f"Error toggling admin status: {e}")
+        log.exception("Error toggling admin status")
     
     return redirect(url_for('admin.user_detail', user_id=user_id))
 
 
 @admin_bp.route('/assessments')
-@login_required
 @admin_required
 def assessments():
     """Assessment management page."""
-    from ..models.assessment import Assessment
-    from ..models.user import User
-    from ..app import db
-    
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor', '', type=str)
     risk_level = request.args.get('risk_level', '', type=str)
     user_search = request.args.get('user_search', '', type=str)
     
-    # Build query with filters
-    query = db.session.query(Assessment, User).join(User)
+    # Build query with filters; load only the columns the table shows, and
+    # fail loudly instead of lazy-loading anything else per row
+    query = db.session.query(Assessment, User).join(User).options(
+        load_only(
+            Assessment.id, Assessment.timestamp, Assessment.risk_level,
+            Assessment.prediction_probability, Assessment.prediction_class,
+            Assessment.model_version
+        ),
+        load_only(User.id, User.username),
+        raiseload('*')
+    )
     
     if risk_level:
         query = query.filter(Assessment.risk_level == risk_level)
@@ -243,39 +265,39 @@ def assessments():
             (User.email.contains(user_search))
         )
     
-    assessments_pagination = query.order_by(Assessment.timestamp.desc()).paginate(
-        page=page, per_page=20, error_out=False
+    assessments_page = keyset_paginate(
+        query, Assessment.timestamp, Assessment.id, cursor, per_page=20,
+        key=lambda row: (row.Assessment.timestamp, row.Assessment.id)
     )
     
     # Get unique risk levels for filter dropdown
-    risk_levels = db.session.query(Assessment.risk_level.distinct()).all()
-    risk_levels = [r[0] for r in risk_levels]
+    with _risk_levels_lock:
+        risk_levels = _risk_levels_cache.get('risk_levels')
+    if risk_levels is None:
+        risk_levels = [r[0] for r in db.session.query(Assessment.risk_level.distinct()).all()]
+        with _risk_levels_lock:
+            _risk_levels_cache['risk_levels'] = risk_levels
     
     return render_template('admin/assessments.html',
-                         assessments=assessments_pagination,
+                         assessments=assessments_page,
+                         cursor=cursor,
                          risk_levels=risk_levels,
                          current_risk_level=risk_level,
                          user_search=user_search)
 
 
 @admin_bp.route('/assessments/<int:assessment_id>/delete', methods=['POST'])
-@login_required
 @admin_required
 def delete_assessment(assessment_id):
     """Delete an assessment (admin only)."""
-    from ..models.assessment import Assessment
-    from ..models.user import User
-    from ..app import db
-    
     assessment = Assessment.query.get_or_404(assessment_id)
-    user = User.query.get(assessment.user_id)
     
     try:
         db.session.delete(assessment)
         
-        # Update user's total assessments count
-        if user:
-            user.total_assessments = max(0, user.total_assessments - 1)
+        # Update user's and platform total assessments count
+        User.decrement_assessments(assessment.user_id)
+        PlatformStats.adjust_assessments(-1)
         
         db.session.commit()
         
@@ -283,56 +305,67 @@ def delete_assessment(assessment_id):
                          f'Deleted assessment ID: {assessment_id}')
         flash('Assessment deleted successfully.', 'success')
         
-    except Exception as e:
+    except Exception:
         db.session.rollback()
         flash('Error deleting assessment.', 'danger')
-        print(f"Error deleting assessment: {e}")
+        log.exception("Error deleting assessment")
     
     return redirect(url_for('admin.assessments'))
 
 
 @admin_bp.route('/analytics')
-@login_required
 @admin_required
 def analytics():
     """Advanced analytics and reporting."""
-    from ..models.user import User
-    from ..models.assessment import Assessment
-    from ..app import db
-    
     # Time-based statistics
-    last_7_days = datetime.utcnow() - timedelta(days=7)
-    last_30_days = datetime.utcnow() - timedelta(days=30)
-    last_90_days = datetime.utcnow() - timedelta(days=90)
+    last_7_days = g.now - timedelta(days=7)
+    last_30_days = g.now - timedelta(days=30)
+    last_90_days = g.now - timedelta(days=90)
+    
+    # All six window counts in one round trip
+    user_growth = select(
+        db.func.count(User.id).filter(User.created_at >= last_7_days).label('users_7d'),
+        db.func.count(User.id).filter(User.created_at >= last_30_days).label('users_30d'),
+        db.func.count(User.id).filter(User.created_at >= last_90_days).label('users_90d')
+    ).subquery()
+    assessment_activity = select(
+        db.func.count(Assessment.id).filter(Assessment.timestamp >= last_7_days).label('assessments_7d'),
+        db.func.count(Assessment.id).filter(Assessment.timestamp >= last_30_days).label('assessments_30d'),
+        db.func.count(Assessment.id).filter(Assessment.timestamp >= last_90_days).label('assessments_90d')
+    ).subquery()
+    counts = db.session.execute(
+        select(user_growth, assessment_activity)
+        .select_from(user_growth.join(assessment_activity, true()))
+    ).one()
     
     analytics_data = {
         'user_growth': {
-            'last_7_days': User.query.filter(User.created_at >= last_7_days).count(),
-            'last_30_days': User.query.filter(User.created_at >= last_30_days).count(),
-            'last_90_days': User.query.filter(User.created_at >= last_90_days).count(),
+            'last_7_days': counts.users_7d,
+            'last_30_days': counts.users_30d,
+            'last_90_days': counts.users_90d,
         },
         'assessment_activity': {
-            'last_7_days': Assessment.query.filter(Assessment.timestamp >= last_7_days).count(),
-            'last_30_days': Assessment.query.filter(Assessment.timestamp >= last_30_days).count(),
-            'last_90_days': Assessment.query.filter(Assessment.timestamp >= last_90_days).count(),
+            'last_7_days': counts.assessments_7d,
+            'last_30_days': counts.assessments_30d,
+            'last_90_days': counts.assessments_90d,
         },
         'risk_trends': db.session.query(
             Assessment.risk_level,
             db.func.count(Assessment.id).label('count'),
             db.func.avg(Assessment.prediction_probability).label('avg_probability')
         ).group_by(Assessment.risk_level).all(),
+        # Last 12 months, oldest first; grouped on the indexed month expression
         'monthly_registrations': db.session.query(
-            db.func.date_trunc('month', User.created_at).label('month'),
+            User.created_month().label('month'),
             db.func.count(User.id).label('count')
-        ).group_by(db.func.date_trunc('month', User.created_at))\
-         .order_by('month').limit(12).all()
+        ).group_by(User.created_month())\
+         .order_by(User.created_month().desc()).limit(12).all()[::-1]
     }
     
     return render_template('admin/analytics.html', analytics=analytics_data)
 
 
 @admin_bp.route('/settings')
-@login_required
 @admin_required
 def settings():
     """Admin settings and configuration."""
@@ -340,14 +373,9 @@ def settings():
 
 
 @admin_bp.route('/create-admin', methods=['GET', 'POST'])
-@login_required
 @admin_required
 def create_admin():
     """Create a new admin user."""
-    from ..forms.auth_forms import RegistrationForm
-    from ..models.user import User
-    from ..app import db
-    
     form = RegistrationForm()
     
     if form.validate_on_submit():
@@ -367,31 +395,52 @@ def create_admin():
             flash(f'Admin user "{user.username}" created successfully.', 'success')
             return redirect(url_for('admin.users'))
             
-        except Exception as e:
+        except IntegrityError:
+            db.session.rollback()
+            if not form.report_taken():
+                flash('Error creating admin user.', 'danger')
+                log.exception("Error creating admin user")
+        except Exception:
             db.session.rollback()
             flash('Error creating admin user.', 'danger')
-            print(f"Error creating admin user: {e}")
+            log.exception("Error creating admin user")
     
     return render_template('admin/create_admin.html', form=form)
 
 
 # API endpoints for admin dashboard
 @admin_bp.route('/api/stats')
-@login_required
 @admin_required
 def api_stats():
     """API endpoint for admin dashboard statistics."""
-    from ..models.user import User
-    from ..models.assessment import Assessment
-    
-    last_24h = datetime.utcnow() - timedelta(hours=24)
-    
-    stats = {
-        'users_last_24h': User.query.filter(User.created_at >= last_24h).count(),
-        'assessments_last_24h': Assessment.query.filter(Assessment.timestamp >= last_24h).count(),
-        'total_users': User.query.count(),
-        'total_assessments': Assessment.query.count(),
-        'active_users': User.query.filter_by(is_active=True).count()
-    }
+    with _stats_lock:
+        stats = _stats_cache.get('api_stats')
+    if stats is None:
+        last_24h = g.now - timedelta(hours=24)
+        
+        # Plain SELECT count(*) per table; Query.count() would wrap each in a subquery
+        user_counts = db.session.execute(
+            select(
+                db.func.count().label('total'),
+                db.func.count().filter(User.created_at >= last_24h).label('last_24h'),
+                db.func.count().filter(User.is_active.is_(True)).label('active')
+            ).select_from(User)
+        ).one()
+        assessment_counts = db.session.execute(
+            select(
+                db.func.count().label('total'),
+                db.func.count().filter(Assessment.timestamp >= last_24h).label('last_24h')
+            ).select_from(Assessment)
+        ).one()
+        
+        stats = {
+            'users_last_24h': user_counts.last_24h,
+            'assessments_last_24h': assessment_counts.last_24h,
+            'total_users': user_counts.total,
+            'total_assessments': assessment_counts.total,
+            'active_users': user_counts.active
+        }
+        with _stats_lock:
+            _stats_cache['api_stats'] = stats
     
     return jsonify(stats)
\ No newline at end of file
@@ -1,14 +1,60 @@
 """
 API blueprint for REST endpoints and AJAX requests
 """
-from flask import Blueprint, request, jsonify
+import time
+import logging
+import orjson
+from flask import Blueprint, Response, g, request
 from flask_login import login_required, current_user
-from datetime import datetime
-from ..utils.helpers import login_required_json, log_user_activity
-from ..utils.ml_engine import cancer_predictor
+from sqlalchemy import delete, select
+from sqlalchemy.orm import load_only
+from datetime import timedelta
+from ..app import db
+from ..models.user import User
+from ..models.assessment import Assessment
+from ..models.platform_stats import PlatformStats
+from ..utils.helpers import (
+    login_required_json, log_user_activity, keyset_paginate, fast_json, ORJSON_OPTIONS
+)
+from ..utils.ml_engine import cancer_predictor, features_from_mapping, FEATURE_NAMES, FEATURE_SET
 
 
 api_bp = Blueprint('api', __name__)
+log = logging.getLogger(__name__)
+
+# Serialized /model/info body; the model doesn't change while the app runs
+_model_info_json = None
+
+# Health probe body; only the timestamp changes, and it is refreshed at most
+# once a second. Stored as one (expires_at, body) tuple so readers never see
+# a mismatched pair.
+_HEALTH_TEMPLATE = (
+    b'{"status":"healthy","timestamp":"%s",'
+    b'"service":"cancer-risk-assessment-api","version":"2.0"}'
+)
+_health_response = (0.0, b'')
+
+# Columns read by Assessment.to_dict(); nothing else needs to be fetched
+_to_dict_columns = load_only(
+    Assessment.id, Assessment.timestamp,
+    Assessment.radius_mean, Assessment.texture_mean, Assessment.perimeter_mean,
+    Assessment.area_mean, Assessment.concave_points_mean, Assessment.symmetry_mean,
+    Assessment.prediction_probability, Assessment.prediction_class, Assessment.risk_level
+)
+
+
+def _feature_errors(data):
+    """Per-field messages for a payload that failed the vectorized check."""
+    errors = []
+    for feature in FEATURE_NAMES:
+        if feature not in data:
+            errors.append(f'Missing feature: {feature}')
+        else:
+            try:
+                float(data[feature])
+            except (ValueError, TypeError):
+                errors.append(f'Invalid value for {feature}')
+    return errors
 
 
 @api_bp.route('/predict', methods=['POST'])
@@ -19,121 +65,118 @@ def predict():
         data = request.get_json()
         
         if not data:
-            return jsonify({'error': 'No data provided'}), 400
+            return fast_json({'error': 'No data provided'}), 400
         
-        # Extract features
-        required_features = [
-            'radius_mean', 'texture_mean', 'perimeter_mean',
-            'area_mean', 'concave_points_mean', 'symmetry_mean'
-        ]
+        if not isinstance(data, dict):
+            return fast_json({'error': 'Request body must be a JSON object'}), 400
         
-        features = []
-        for feature in required_features:
-            if feature not in data:
-                return jsonify({'error': f'Missing feature: {feature}'}), 400
-            features.append(float(data[feature]))
+        missing = FEATURE_SET - data.keys()
+        if missing:
+            feature = next(name for name in FEATURE_NAMES if name in missing)
+            return fast_json({'error': f'Missing feature: {feature}'}), 400
+        
+        # Extract features
+        features = features_from_mapping(data)
         
         # Validate input
         is_valid, message = cancer_predictor.validate_input(features)
         if not is_valid:
-            return jsonify({'error': message}), 400
+            errors = _feature_errors(data)
+            return fast_json({'error': errors[0] if errors else message}), 400
         
         # Make prediction
         result = cancer_predictor.predict(features)
         
         if result:
             log_user_activity('api_prediction', f'Risk: {result["risk_level"]}')
-            return jsonify({
+            return fast_json({
                 'success': True,
                 'prediction': result,
-                'timestamp': datetime.utcnow().isoformat()
+                'timestamp': g.now.isoformat()
             })
         else:
-            return jsonify({'error': 'Prediction failed'}), 500
+            return fast_json({'error': 'Prediction failed'}), 500
             
     except ValueError as e:
-        return jsonify({'error': f'Invalid input: {str(e)}'}), 400
-    except Exception as e:
-        print(f"API prediction error: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return fast_json({'error': f'Invalid input: {str(e)}'}), 400
+    except Exception:
+        log.exception("API prediction error")
+        return fast_json({'error': 'Internal server error'}), 500
 
 
 @api_bp.route('/assessments', methods=['GET'])
 @login_required_json
 def get_assessments():
     """API endpoint to get user's assessments."""
-    from ..models.assessment import Assessment
-    
     try:
-        page = request.args.get('page', 1, type=int)
+        cursor = request.args.get('cursor', '', type=str)
         per_page = min(request.args.get('per_page', 10, type=int), 50)  # Max 50 per page
         
-        assessments = Assessment.query.filter_by(user_id=current_user.id)\
-            .order_by(Assessment.timestamp.desc())\
-            .paginate(page=page, per_page=per_page, error_out=False)
+        assessments = keyset_paginate(
+            Assessment.query.filter_by(user_id=current_user.id).options(_to_dict_columns),
+            Assessment.timestamp, Assessment.id, cursor, per_page=per_page
+        )
         
-        return jsonify({
+        return fast_json({
             'assessments': [assessment.to_dict() for assessment in assessments.items],
-            'total': assessments.total,
-            'pages': assessments.pages,
-            'current_page': page,
+            'next_cursor': assessments.next_cursor,
+            'has_next': assessments.has_next,
             'per_page': per_page
         })
         
-    except Exception as e:
-        print(f"API get assessments error: {e}")
-        return jsonify({'error': 'Failed to retrieve assessments'}), 500
+    except Exception:
+        log.exception("API get assessments error")
+        return fast_json({'error': 'Failed to retrieve assessments'}), 500
 
 
 @api_bp.route('/assessments/<int:assessment_id>', methods=['GET'])
 @login_required_json
 def get_assessment(assessment_id):
     """API endpoint to get a specific assessment."""
-    from ..models.assessment import Assessment
-    
     try:
         assessment = Assessment.query.filter_by(
             id=assessment_id,
             user_id=current_user.id
-        ).first()
+        ).options(_to_dict_columns).first()
         
         if not assessment:
-            return jsonify({'error': 'Assessment not found'}), 404
+            return fast_json({'error': 'Assessment not found'}), 404
         
-        return jsonify(assessment.to_dict())
+        return fast_json(assessment.to_dict())
         
-    except Exception as e:
-        print(f"API get assessment error: {e}")
-        return jsonify({'error': 'Failed to retrieve assessment'}), 500
+    except Exception:
+        log.exception("API get assessment error")
+        return fast_json({'error': 'Failed to retrieve assessment'}), 500
 
 
 @api_bp.route('/assessments/<int:assessment_id>', methods=['DELETE'])
 @login_required_json
 def delete_assessment(assessment_id):
     """API endpoint to delete an assessment."""
-    from ..models.assessment import Assessment
-    from ..app import db
-    
     try:
-        assessment = Assessment.query.filter_by(
-            id=assessment_id,
-            user_id=current_user.id
-        ).first()
-        
-        if not assessment:
-            return jsonify({'error': 'Assessment not found'}), 404
-        
-        db.session.delete(assessment)
-        current_user.total_assessments = max(0, current_user.total_assessments - 1)
+        # Ownership check and delete in one statement, without loading the row
+        result = db.session.execute(
+            delete(Assessment).where(
+                Assessment.id == assessment_id,
+                Assessment.user_id == current_user.id
+            )
+        )
+        
+        if result.rowcount == 0:
+            db.session.rollback()
+            return fast_json({'error': 'Assessment not found'}), 404
+        
+        User.decrement_assessments(current_user.id)
+        PlatformStats.adjust_assessments(-1)
         db.session.commit()
         
         log_user_activity('api_assessment_deleted', f'ID: {assessment_id}')
-        return jsonify({'message': 'Assessment deleted successfully'})
+        return fast_json({'message': 'Assessment deleted successfully'})
         
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print(f"API delete assessment error: {e}")
-        return jsonify({'error': 'Failed to delete assessment'}), 500
+        log.exception("API delete assessment error")
+        return fast_json({'error': 'Failed to delete assessment'}), 500
 
 
 @api_bp.route('/statistics', methods=['GET'])
@@ -141,31 +184,33 @@ def delete_assessment(assessment_id):
 def get_statistics():
     """API endpoint for user statistics."""
     try:
-        from ..models.assessment import Assessment
-        from ..app import db
-        from datetime import timedelta
-        
         # Calculate various statistics
         total_assessments = current_user.total_assessments
         
-        # Last 30 days
-        last_30_days = datetime.utcnow() - timedelta(days=30)
-        recent_count = Assessment.query.filter(
-            Assessment.user_id == current_user.id,
-            Assessment.timestamp >= last_30_days
-        ).count()
-        
-        # Average risk
-        avg_risk = db.session.query(
-            db.func.avg(Assessment.prediction_probability)
-        ).filter_by(user_id=current_user.id).scalar()
-        
-        # Risk distribution
-        risk_distribution = dict(current_user.get_risk_distribution())
-        
-        # Latest assessment
-        latest_assessment = Assessment.query.filter_by(user_id=current_user.id)\
-            .order_by(Assessment.timestamp.desc()).first()
+        # Per-risk-level aggregates in one statement; the overall 30-day
+        # count and average are summed from these rows in Python
+        last_30_days = g.now - timedelta(days=30)
+        rows = db.session.execute(
+            select(
+                Assessment.risk_level,
+                db.func.count().label('count'),
+                db.func.count().filter(Assessment.timestamp >= last_30_days).label('recent'),
+                db.func.sum(Assessment.prediction_probability).label('probability_sum')
+            ).where(Assessment.user_id == current_user.id)
+            .group_by(Assessment.risk_level)
+        ).all()
+        
+        risk_distribution = {row.risk_level: row.count for row in rows}
+        counted = sum(risk_distribution.values())
+        recent_count = sum(row.recent for row in rows)
+        avg_risk = sum(row.probability_sum for row in rows) / counted if counted else None
+        
+        # Latest assessment, only fetched when the user has any
+        latest_assessment = None
+        if counted:
+            latest_assessment = Assessment.query.filter_by(user_id=current_user.id)\
+                .options(_to_dict_columns)\
+                .order_by(Assessment.timestamp.desc()).first()
         
         stats = {
             'total_assessments': total_assessments,
@@ -177,37 +222,41 @@ def get_statistics():
             'last_login': current_user.last_login.isoformat() if current_user.last_login else None
         }
         
-        return jsonify(stats)
+        return fast_json(stats)
         
-    except Exception as e:
-        print(f"API statistics error: {e}")
-        return jsonify({'error': 'Failed to retrieve statistics'}), 500
+    except Exception:
+        log.exception("API statistics error")
+        return fast_json({'error': 'Failed to retrieve statistics'}), 500
 
 
 @api_bp.route('/model/info', methods=['GET'])
 @login_required_json
 def get_model_info():
     """API endpoint for ML model information."""
+    global _model_info_json
     try:
-        # Load model to get metadata
-        cancer_predictor.load_model()
-        
-        feature_importance = cancer_predictor.get_feature_importance()
-        
-        model_info = {
-            'version': cancer_predictor.version,
-            'feature_names': cancer_predictor.feature_names,
-            'feature_importance': feature_importance,
-            'model_type': 'Logistic Regression',
-            'input_features': 6,
-            'risk_levels': ['Very Low', 'Low', 'Moderate', 'High']
-        }
-        
-        return jsonify(model_info)
-        
-    except Exception as e:
-        print(f"API model info error: {e}")
-        return jsonify({'error': 'Failed to retrieve model information'}), 500
+        if _model_info_json is None:
+            # Load model to get metadata
+            if not cancer_predictor.ensure_loaded():
+                return fast_json({'error': 'Failed to retrieve model information'}), 500
+            
+            feature_importance = cancer_predictor.get_feature_importance()
+            
+            model_info = {
+                'version': cancer_predictor.version,
+                'feature_names': cancer_predictor.feature_names,
+                'feature_importance': feature_importance,
+                'model_type': 'Logistic Regression',
+                'input_features': 6,
+                'risk_levels': ['Very Low', 'Low', 'Moderate', 'High']
+            }
+            _model_info_json = orjson.dumps(model_info, option=ORJSON_OPTIONS)
+        
+        return Response(_model_info_json, mimetype='application/json')
+        
+    except Exception:
+        log.exception("API model info error")
+        return fast_json({'error': 'Failed to retrieve model information'}), 500
 
 
 @api_bp.route('/validate', methods=['POST'])
@@ -218,75 +267,68 @@ def validate_input():
         data = request.get_json()
         
         if not data:
-            return jsonify({'valid': False, 'errors': ['No data provided']}), 400
+            return fast_json({'valid': False, 'errors': ['No data provided']}), 400
         
-        # Extract features
-        required_features = [
-            'radius_mean', 'texture_mean', 'perimeter_mean',
-            'area_mean', 'concave_points_mean', 'symmetry_mean'
-        ]
+        if not isinstance(data, dict):
+            return fast_json({'valid': False, 'errors': ['Request body must be a JSON object']}), 400
         
         errors = []
-        features = []
-        
-        for feature in required_features:
-            if feature not in data:
-                errors.append(f'Missing feature: {feature}')
-            else:
-                try:
-                    value = float(data[feature])
-                    features.append(value)
-                except (ValueError, TypeError):
-                    errors.append(f'Invalid value for {feature}')
+        try:
+            features = features_from_mapping(data)
+        except (ValueError, TypeError):
+            features = None
         
-        if not errors:
-            # Validate ranges
+        if features is None:
+            errors = _feature_errors(data)
+        else:
+            # Validate ranges; only walk the fields one by one if that fails
             is_valid, message = cancer_predictor.validate_input(features)
             if not is_valid:
-                errors.append(message)
+                errors = _feature_errors(data) or [message]
         
-        return jsonify({
+        return fast_json({
             'valid': len(errors) == 0,
             'errors': errors
         })
         
-    except Exception as e:
-        print(f"API validation error: {e}")
-        return jsonify({'valid': False, 'errors': ['Validation failed']}), 500
+    except Exception:
+        log.exception("API validation error")
+        return fast_json({'valid': False, 'errors': ['Validation failed']}), 500
 
 
 @api_bp.route('/health', methods=['GET'])
 def health_check():
     """API health check endpoint."""
-    return jsonify({
-        'status': 'healthy',
-        'timestamp': datetime.utcnow().isoformat(),
-        'service': 'cancer-risk-assessment-api',
-        'version': '2.0'
-    })
+    global _health_response
+    expires_at, body = _health_response
+    now = time.monotonic()
+    if now >= expires_at:
+        body = _HEALTH_TEMPLATE % g.now.isoformat(timespec='seconds').encode()
+        _health_response = (now + 1.0, body)
+    return Response(body, mimetype='application/json')
 
 
 # Error handlers for API blueprint
 @api_bp.errorhandler(400)
 def bad_request(error):
-    return jsonify({'error': 'Bad request'}), 400
+    return fast_json({'error': 'Bad request'}), 400
 
 
 @api_bp.errorhandler(401)
 def unauthorized(error):
-    return jsonify({'error': 'Unauthorized'}), 401
+    return fast_json({'error': 'Unauthorized'}), 401
 
 
 @api_bp.errorhandler(403)
 def forbidden(error):
-    return jsonify({'error': 'Forbidden'}), 403
+    return fast_json({'error': 'Forbidden'}), 403
 
 
 @api_bp.errorhandler(404)
 def not_found(error):
-    return jsonify({'error': 'Not found'}), 404
+    return fast_json({'error': 'Not found'}), 404
 
 
 @api_bp.errorhandler(500)
 def internal_error(error):
-    return jsonify({'error': 'Internal server error'}), 500
\ No newline at end of file
+    return fast_json({'error': 'Internal server error'}), 500
\ No newline at end of file
@@ -1,14 +1,16 @@
 """
 Assessment blueprint for cancer risk evaluation
 """
+import logging
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
-from datetime import datetime
-from ..utils.helpers import create_gauge_chart, log_user_activity, flash_errors
-from ..utils.ml_engine import cancer_predictor
+import time
+from ..utils.helpers import create_gauge_chart, log_user_activity, flash_errors, keyset_paginate
+from ..utils.ml_engine import cancer_predictor, features_from_mapping, FEATURE_NAMES
 
 
 assessment_bp = Blueprint('assessment', __name__)
+log = logging.getLogger(__name__)
 
 
 @assessment_bp.route('/')
@@ -26,43 +28,31 @@ def submit():
     """Handle assessment form submission."""
     from ..forms.assessment_forms import AssessmentForm
     from ..models.assessment import Assessment
+    from ..models.platform_stats import PlatformStats
+    from ..models.user import User
     from ..app import db
     
     form = AssessmentForm()
     
     if form.validate_on_submit():
         try:
-            # Extract features
-            features = [
-                form.radius_mean.data,
-                form.texture_mean.data,
-                form.perimeter_mean.data,
-                form.area_mean.data,
-                form.concave_points_mean.data,
-                form.symmetry_mean.data
-            ]
+            # Extract features straight into an array in model order
+            form_data = form.data
+            features = features_from_mapping(form_data)
             
-            # Validate input
-            is_valid, message = cancer_predictor.validate_input(features)
-            if not is_valid:
-                flash(f"Invalid input: {message}", 'danger')
-                return render_template('assessment/form.html', form=form)
+            # No validate_input() here: the form's NumberRange validators
+            # enforce the same bounds as FEATURE_MIN/FEATURE_MAX
             
             # Make prediction
-            start_time = datetime.utcnow()
+            start_time = time.perf_counter()
             result = cancer_predictor.predict(features)
-            processing_time = (datetime.utcnow() - start_time).total_seconds()
+            processing_time = time.perf_counter() - start_time
             
             if result:
                 # Save assessment to database
                 assessment = Assessment(
                     user_id=current_user.id,
-                    radius_mean=form.radius_mean.data,
-                    texture_mean=form.texture_mean.data,
-                    perimeter_mean=form.perimeter_mean.data,
-                    area_mean=form.area_mean.data,
-                    concave_points_mean=form.concave_points_mean.data,
-                    symmetry_mean=form.symmetry_mean.data,
+                    **{name: form_data[name] for name in FEATURE_NAMES},
                     prediction_probability=result['probability'],
                     prediction_class=result['prediction'],
                     risk_level=result['risk_level'],
@@ -71,9 +61,10 @@ def submit():
                 )
                 
                 db.session.add(assessment)
+                PlatformStats.adjust_assessments(1)
                 
                 # Update user statistics
-                current_user.increment_assessments()
+                User.increment_assessments(current_user.id)
                 
                 db.session.commit()
                 
@@ -85,10 +76,10 @@ def submit():
             else:
                 flash('Error processing assessment. Please try again.', 'danger')
                 
-        except Exception as e:
+        except Exception:
             db.session.rollback()
             flash('An error occurred during assessment. Please try again.', 'danger')
-            print(f"Assessment error: {e}")
+            log.exception("Assessment error")
     else:
         flash_errors(form)
     
@@ -108,7 +99,7 @@ def result(assessment_id):
     
     # Create gauge chart
     gauge_chart = create_gauge_chart(
-        assessment.prediction_probability,
+        round(assessment.prediction_probability, 3),
         "Malignancy Risk"
     )
     
@@ -127,12 +118,18 @@ def history():
     """Display user's assessment history."""
     from ..models.assessment import Assessment
     
-    page = request.args.get('page', 1, type=int)
-    assessments = Assessment.query.filter_by(user_id=current_user.id)\
-        .order_by(Assessment.timestamp.desc())\
-        .paginate(page=page, per_page=20, error_out=False)
+    cursor = request.args.get('cursor')
     
-    return render_template('assessment/history.html', assessments=assessments)
+    # Seek past the cursor on ix_assessment_user_ts instead of OFFSET, so
+    # deep pages cost the same as the first
+    assessments_page = keyset_paginate(
+        Assessment.query.filter_by(user_id=current_user.id),
+        Assessment.timestamp, Assessment.id, cursor, per_page=20
+    )
+    
+    return render_template('assessment/history.html',
+                         assessments=assessments_page,
+                         cursor=cursor)
 
 
 @assessment_bp.route('/export/<format>')
@@ -140,42 +137,26 @@ def history():
 def export_history(format):
     """Export assessment history in various formats."""
     from ..models.assessment import Assessment
-    import csv
-    import io
-    from flask import Response
-    
-    assessments = Assessment.query.filter_by(user_id=current_user.id)\
-        .order_by(Assessment.timestamp.desc()).all()
+    from flask import Response, stream_with_context
     
     if format.lower() == 'csv':
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow([
-            'Date', 'Risk Level', 'Probability (%)', 'Classification',
-            'Radius Mean', 'Texture Mean', 'Perimeter Mean', 
-            'Area Mean', 'Concave Points Mean', 'Symmetry Mean'
-        ])
-        
-        # Write data
-        for assessment in assessments:
-            writer.writerow([
-                assessment.timestamp.strftime('%Y-%m-%d %H:%M'),
-                assessment.risk_level,
-                f"{assessment.probability_percentage}%",
-                assessment.prediction_text,
-                assessment.radius_mean,
-                assessment.texture_mean,
-                assessment.perimeter_mean,
-                assessment.area_mean,
-                assessment.concave_points_mean,
-                assessment.symmetry_mean
-            ])
+        def generate():
+            # Write header
+            yield ('Date,Risk Level,Probability (%),Classification,'
+                   'Radius Mean,Texture Mean,Perimeter Mean,'
+                   'Area Mean,Concave Points Mean,Symmetry Mean\r\n')
+            
+            # Every column is a non-null number or a fixed label, so rows never
+            # need quoting; chunked fetch from the cursor as before
+            assessments = Assessment.query.filter_by(user_id=current_user.id)\
+                .order_by(Assessment.timestamp.desc()).yield_per(500)
+            for a in assessments:
+                yield (f'{a.timestamp:%Y-%m-%d %H:%M},{a.risk_level},{a.probability_percentage}%,'
+                       f'{a.prediction_text},{a.radius_mean},{a.texture_mean},'
+                       f'{a.perimeter_mean},{a.area_mean},{a.concave_points_mean},{a.symmetry_mean}\r\n')
         
-        output.seek(0)
         return Response(
-            output.getvalue(),
+            stream_with_context(generate()),
             mimetype='text/csv',
             headers={
                 'Content-Disposition': 'attachment; filename=assessment_history.csv'
@@ -191,6 +172,8 @@ def export_history(format):
 def delete_assessment(assessment_id):
     """Delete an assessment."""
     from ..models.assessment import Assessment
+    from ..models.platform_stats import PlatformStats
+    from ..models.user import User
     from ..app import db
     
     assessment = Assessment.query.filter_by(
@@ -201,17 +184,18 @@ def delete_assessment(assessment_id):
     try:
         db.session.delete(assessment)
         
-        # Update user statistics
-        current_user.total_assessments = max(0, current_user.total_assessments - 1)
+        # Update user and platform statistics
+        User.decrement_assessments(current_user.id)
+        PlatformStats.adjust_assessments(-1)
         
         db.session.commit()
         
         log_user_activity('assessment_deleted', f'ID: {assessment_id}')
         flash('Assessment deleted successfully.', 'success')
         
-    except Exception as e:
+    except Exception:
         db.session.rollback()
         flash('Error deleting assessment.', 'danger')
-        print(f"Delete assessment error: {e}")
+        log.exception("Delete assessment error")
     
     return redirect(url_for('assessment.history'))
\ No newline at end of file
@@ -1,15 +1,32 @@
 """
 Authentication blueprint for user login, registration, and logout
 """
+import logging
+from urllib.parse import urlsplit
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_user, logout_user, login_required, current_user
-from urllib.parse import urlparse
+from sqlalchemy.exc import IntegrityError
 from ..utils.helpers import flash_errors, log_user_activity
 from ..utils.validators import StrongPassword, UniqueField, validate_username, validate_email
 
 
 
 auth_bp = Blueprint('auth', __name__)
+log = logging.getLogger(__name__)
+
+
+def _is_local_path(target):
+    """Whether a ?next= value is a path on this site and safe to redirect to."""
+    # Browsers drop tabs/newlines from URLs ('/\t/host' becomes '//host') and
+    # newlines can't go in a Location header at all
+    if not target or any(ord(c) < 32 or ord(c) == 127 for c in target):
+        return False
+    parts = urlsplit(target)
+    if parts.scheme or parts.netloc:
+        return False
+    # A leading slash-backslash is treated like '//', another host
+    return target[0] == '/' and not target.startswith(('//', '/\\'))
+
 
 @auth_bp.route('/addmin')
 def index():
@@ -30,17 +47,15 @@ def login():
         from ..models.user import User
         
         # Check if username is email or username
-        user = User.query.filter(
-            (User.username == form.username.data) | (User.email == form.username.data)
-        ).first()
+        user = User.find_by_login(form.username.data)
         
         if user and user.check_password(form.password.data):
             login_user(user, remember=True)
             user.update_last_login()
             
-            # Handle next page redirect
+            # Handle next page redirect; only same-site paths are allowed
             next_page = request.args.get('next')
-            if not next_page or urlparse(next_page).netloc != '':
+            if not _is_local_path(next_page):
                 next_page = url_for('dashboard.index')
             
             log_user_activity('login', f'from {request.remote_addr}')
@@ -82,10 +97,15 @@ def register():
             flash('Registration successful! You can now log in.', 'success')
             return redirect(url_for('auth.login'))
             
-        except Exception as e:
+        except IntegrityError:
+            db.session.rollback()
+            if not form.report_taken():
+                flash('Registration failed. Please try again.', 'danger')
+                log.exception("Registration error")
+        except Exception:
             db.session.rollback()
             flash('Registration failed. Please try again.', 'danger')
-            print(f"Registration error: {e}")
+            log.exception("Registration error")
     
     return render_template('auth/register.html', form=form)
 
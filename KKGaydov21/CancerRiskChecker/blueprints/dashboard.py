@@ -1,14 +1,36 @@
 """
 Dashboard blueprint for user statistics and overview
 """
-from flask import Blueprint, render_template, request, jsonify
+from threading import Lock
+from cachetools import TTLCache
+from flask import Blueprint, render_template, request, jsonify, g
 from flask_login import login_required, current_user
+from sqlalchemy import select
 from datetime import datetime, timedelta
-from ..utils.helpers import create_trend_chart, log_user_activity
+from ..utils.helpers import create_trend_chart, fast_json, log_user_activity
+from ..utils.ml_engine import FEATURE_NAMES
 
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
+# Rendered trend charts keyed by (user id, ids of the charted assessments).
+# Assessments are never edited, so the ids pin down the chart exactly; a new
+# or deleted assessment changes the key.
+_trend_chart_cache = TTLCache(maxsize=1024, ttl=3600)
+_trend_chart_lock = Lock()
+
+
+def _trend_chart_for(user_id, assessments):
+    """Return the trend chart JSON for these assessments, rendering on a miss."""
+    key = (user_id, tuple(a.id for a in assessments))
+    with _trend_chart_lock:
+        chart = _trend_chart_cache.get(key)
+    if chart is None:
+        chart = create_trend_chart(assessments)
+        with _trend_chart_lock:
+            _trend_chart_cache[key] = chart
+    return chart
+
 
 @dashboard_bp.route('/')
 @login_required
@@ -20,34 +42,32 @@ def index():
     # Get user's recent assessments
     recent_assessments = current_user.get_recent_assessments(limit=10)
     
-    # Get statistics
-    total_assessments = current_user.total_assessments
-    risk_distribution = current_user.get_risk_distribution()
-    
-    # Calculate additional statistics
-    last_30_days = datetime.utcnow() - timedelta(days=30)
-    recent_count = Assessment.query.filter(
-        Assessment.user_id == current_user.id,
-        Assessment.timestamp >= last_30_days
-    ).count()
+    # Risk distribution, 30-day count and average risk from one grouped query
+    last_30_days = g.now - timedelta(days=30)
+    rows = db.session.query(
+        Assessment.risk_level,
+        db.func.count(Assessment.id).label('count'),
+        db.func.count(Assessment.id).filter(Assessment.timestamp >= last_30_days).label('recent'),
+        db.func.sum(Assessment.prediction_probability).label('probability_sum')
+    ).filter_by(user_id=current_user.id).group_by(Assessment.risk_level).all()
     
-    # Get average risk probability
-    avg_risk = db.session.query(
-        db.func.avg(Assessment.prediction_probability)
-    ).filter_by(user_id=current_user.id).scalar()
+    risk_distribution = {row.risk_level: row.count for row in rows}
+    total_assessments = sum(risk_distribution.values())
+    recent_count = sum(row.recent for row in rows)
+    avg_risk = sum(row.probability_sum for row in rows) / total_assessments if total_assessments else None
     
     avg_risk = round(avg_risk * 100, 1) if avg_risk else 0
     
     # Create trend chart if user has assessments
     trend_chart = None
     if recent_assessments:
-        trend_chart = create_trend_chart(recent_assessments)
+        trend_chart = _trend_chart_for(current_user.id, recent_assessments)
     
     stats = {
         'total_assessments': total_assessments,
         'recent_count': recent_count,
         'avg_risk': avg_risk,
-        'risk_distribution': dict(risk_distribution) if risk_distribution else {}
+        'risk_distribution': risk_distribution
     }
     
     return render_template('dashboard/index.html',
@@ -65,10 +85,10 @@ def analytics():
     
     # Time-based analysis
     assessments_by_month = db.session.query(
-        db.func.date_trunc('month', Assessment.timestamp).label('month'),
+        Assessment.timestamp_month().label('month'),
         db.func.count(Assessment.id).label('count')
     ).filter_by(user_id=current_user.id)\
-     .group_by(db.func.date_trunc('month', Assessment.timestamp))\
+     .group_by(Assessment.timestamp_month())\
      .order_by('month').all()
     
     # Risk level trends
@@ -176,59 +196,82 @@ def api_stats():
 @login_required
 def api_recent_assessments():
     """API endpoint for recent assessments."""
-    limit = request.args.get('limit', 10, type=int)
-    assessments = current_user.get_recent_assessments(limit=limit)
+    from ..models.assessment import Assessment
+    from ..app import db
     
-    return jsonify([assessment.to_dict() for assessment in assessments])
+    limit = max(1, min(request.args.get('limit', 10, type=int), 50))  # Max 50
+    rows = db.session.execute(
+        select(
+            Assessment.id, Assessment.timestamp,
+            *(getattr(Assessment, name) for name in FEATURE_NAMES),
+            Assessment.prediction_probability, Assessment.prediction_class,
+            Assessment.risk_level
+        )
+        .where(Assessment.user_id == current_user.id)
+        .order_by(Assessment.timestamp.desc(), Assessment.id.desc())
+        .limit(limit)
+    ).all()
+    
+    # Same shape as Assessment.to_dict(), built from plain row tuples
+    return fast_json([
+        {
+            'id': row.id,
+            'timestamp': row.timestamp.isoformat(),
+            'features': {name: getattr(row, name) for name in FEATURE_NAMES},
+            'prediction_probability': row.prediction_probability,
+            'prediction_class': row.prediction_class,
+            'prediction_text': 'Malignant' if row.prediction_class == 1 else 'Benign',
+            'risk_level': row.risk_level,
+            'probability_percentage': round(row.prediction_probability * 100, 1)
+        }
+        for row in rows
+    ])
 
 
 @dashboard_bp.route('/export/dashboard-report')
 @login_required
 def export_dashboard_report():
     """Export comprehensive dashboard report."""
-    from ..models.assessment import Assessment
-    import io
-    from flask import Response
+    from flask import Response, stream_with_context
     from datetime import datetime
     
-    # Generate comprehensive report
-    report_lines = [
-        f"Cancer Risk Assessment Dashboard Report",
-        f"Generated for: {current_user.full_name or current_user.username}",
-        f"Generated on: {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}",
-        f"",
-        f"Summary Statistics:",
-        f"- Total Assessments: {current_user.total_assessments}",
-        f"- Member Since: {current_user.created_at.strftime('%Y-%m-%d')}",
-        f"- Last Assessment: {current_user.last_assessment.strftime('%Y-%m-%d') if current_user.last_assessment else 'None'}",
-        f"",
-        f"Risk Distribution:"
-    ]
-    
-    # Add risk distribution
-    risk_distribution = current_user.get_risk_distribution()
-    for risk_level, count in risk_distribution:
-        report_lines.append(f"- {risk_level}: {count} assessments")
-    
-    report_lines.extend([
-        f"",
-        f"Recent Assessments:",
-        f"Date\t\tRisk Level\t\tProbability"
-    ])
-    
-    # Add recent assessments
-    recent_assessments = current_user.get_recent_assessments(limit=20)
-    for assessment in recent_assessments:
-        report_lines.append(
-            f"{assessment.timestamp.strftime('%Y-%m-%d %H:%M')}\t"
-            f"{assessment.risk_level}\t\t"
-            f"{assessment.probability_percentage}%"
+    def generate():
+        # Generate comprehensive report
+        yield (
+            f"Cancer Risk Assessment Dashboard Report\n"
+            f"Generated for: {current_user.full_name or current_user.username}\n"
+            f"Generated on: {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}\n"
+            f"\n"
+            f"Summary Statistics:\n"
+            f"- Total Assessments: {current_user.total_assessments}\n"
+            f"- Member Since: {current_user.created_at.strftime('%Y-%m-%d')}\n"
+            f"- Last Assessment: {current_user.last_assessment.strftime('%Y-%m-%d') if current_user.last_assessment else 'None'}\n"
+            f"\n"
+            f"Risk Distribution:\n"
         )
-    
-    report_content = '\n'.join(report_lines)
+        
+        # Add risk distribution
+        risk_distribution = current_user.get_risk_distribution()
+        for risk_level, count in risk_distribution:
+            yield f"- {risk_level}: {count} assessments\n"
+        
+        yield (
+            f"\n"
+            f"Recent Assessments:\n"
+            f"Date\t\tRisk Level\t\tProbability\n"
+        )
+        
+        # Add recent assessments
+        recent_assessments = current_user.get_recent_assessments(limit=20)
+        for assessment in recent_assessments:
+            yield (
+                f"{assessment.timestamp.strftime('%Y-%m-%d %H:%M')}\t"
+                f"{assessment.risk_level}\t\t"
+                f"{assessment.probability_percentage}%\n"
+            )
     
     return Response(
-        report_content,
+        stream_with_context(generate()),
         mimetype='text/plain',
         headers={
             'Content-Disposition': 'attachment; filename=dashboard_report.txt'
@@ -3,7 +3,7 @@ Main blueprint for public pages and general routes
 """
 from flask import Blueprint, render_template, request, jsonify
 from flask_login import current_user
-from ..models.assessment import Assessment
+from ..models.platform_stats import PlatformStats
 
 
 main_bp = Blueprint('main', __name__)
@@ -14,7 +14,7 @@ def index():
     """Home page with platform overview."""
     # Get some basic statistics for the homepage
     stats = {
-        'total_assessments': Assessment.query.count(),
+        'total_assessments': PlatformStats.get_total_assessments(),
         'total_users': 0,  # Will be calculated if needed
         'success_rate': 95.2  # Example metric
     }
@@ -62,36 +62,49 @@ def health_check():
     })
 
 
+SITEMAP_PAGES = (
+    'main.index',
+    'main.about',
+    'main.privacy',
+    'main.terms',
+    'main.contact',
+    'main.faq',
+    'auth.login',
+    'auth.register'
+)
+
+# Built on the first request (url_for needs an app context); only the host
+# differs between requests after that.
+_sitemap_template = None
+
+
+def _build_sitemap_template():
+    """Render the sitemap once with a {host} placeholder for the URL root."""
+    from flask import url_for
+    
+    urls = ''.join(
+        f'<url><loc>{{host}}{url_for(page)}</loc>'
+        '<changefreq>weekly</changefreq><priority>0.8</priority></url>\n'
+        for page in SITEMAP_PAGES
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        f'{urls}</urlset>'
+    )
+
+
 @main_bp.route('/sitemap.xml')
 def sitemap():
     """Generate sitemap for SEO."""
-    from flask import Response, url_for
-    
-    pages = [
-        'main.index',
-        'main.about',
-        'main.privacy',
-        'main.terms',
-        'main.contact',
-        'main.faq',
-        'auth.login',
-        'auth.register'
-    ]
-    
-    sitemap_xml = ['<?xml version="1.0" encoding="UTF-8"?>']
-    sitemap_xml.append('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">')
-    
-    for page in pages:
-        sitemap_xml.append('<url>')
-        sitemap_xml.append(f'<loc>{request.url_root[:-1]}{url_for(page)}</loc>')
-        sitemap_xml.append('<changefreq>weekly</changefreq>')
-        sitemap_xml.append('<priority>0.8</priority>')
-        sitemap_xml.append('</url>')
+    from flask import Response
+    global _sitemap_template
     
-    sitemap_xml.append('</urlset>')
+    if _sitemap_template is None:
+        _sitemap_template = _build_sitemap_template()
     
-    response = Response('\n'.join(sitemap_xml), mimetype='application/xml')
-    return response
+    return Response(_sitemap_template.format(host=request.url_root[:-1]),
+                    mimetype='application/xml')
 
 
 @main_bp.app_errorhandler(404)
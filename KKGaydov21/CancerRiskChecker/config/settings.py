@@ -16,6 +16,9 @@ class Config:
     SQLALCHEMY_ENGINE_OPTIONS = {
         "pool_recycle": 300,
         "pool_pre_ping": True,
+        # Room for every distinct statement the blueprints issue (the default
+        # is 500), so hot queries never fall out and get recompiled
+        "query_cache_size": 1200,
     }
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
@@ -44,6 +47,18 @@ class ProductionConfig(Config):
     """Production configuration."""
     DEBUG = False
     TESTING = False
+    
+    # Served by gevent workers (see gunicorn.conf.py), where many greenlets in
+    # one process can each hold a connection at once
+    if not Config.SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            **Config.SQLALCHEMY_ENGINE_OPTIONS,
+            "pool_size": 20,
+            "max_overflow": 40,
+        }
+        # psycopg2 only: batch executemany() through execute_values
+        if Config.SQLALCHEMY_DATABASE_URI.split('://', 1)[0] in ('postgresql', 'postgresql+psycopg2'):
+            SQLALCHEMY_ENGINE_OPTIONS["executemany_mode"] = "values_plus_batch"
 
 
 class TestingConfig(Config):
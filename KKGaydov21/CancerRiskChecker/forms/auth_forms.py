@@ -59,31 +59,41 @@ class RegistrationForm(FlaskForm):
     )
     submit = SubmitField('Create Account')
 
+    # Uniqueness is left to the users table's UNIQUE constraints: views
+    # insert directly and call report_taken() if that raises IntegrityError.
+
     def validate_username(self, username):
-        """Validate username format and uniqueness."""
-        # Check format
+        """Validate username format."""
         is_valid, message = validate_username(username.data)
         if not is_valid:
             raise ValidationError(message)
-        
-        # Check uniqueness
-        from ..models.user import User
-        user = User.query.filter_by(username=username.data).first()
-        if user:
-            raise ValidationError('Username already exists. Please choose a different one.')
 
     def validate_email(self, email):
-        """Validate email format and uniqueness."""
-        # Check format
+        """Validate email format."""
         is_valid, message = validate_email(email.data)
         if not is_valid:
             raise ValidationError(message)
+
+    def report_taken(self):
+        """After a failed INSERT, attach errors to whichever fields are taken.
         
-        # Check uniqueness
+        Returns False if neither is, i.e. the IntegrityError had another cause.
+        """
+        from sqlalchemy import or_, select
+        from ..app import db
         from ..models.user import User
-        user = User.query.filter_by(email=email.data.lower()).first()
-        if user:
-            raise ValidationError('Email already registered. Please use a different email.')
+        
+        username, email = self.username.data, self.email.data.lower()
+        rows = db.session.execute(
+            select(User.username, User.email)
+            .where(or_(User.username == username, User.email == email))
+        ).all()
+        
+        if any(row.username == username for row in rows):
+            self.username.errors.append('Username already exists. Please choose a different one.')
+        if any(row.email == email for row in rows):
+            self.email.errors.append('Email already registered. Please use a different email.')
+        return bool(rows)
 
 
 class ChangePasswordForm(FlaskForm):
@@ -121,8 +131,7 @@ class ForgotPasswordForm(FlaskForm):
     def validate_email(self, email):
         """Validate that email exists in system."""
         from ..models.user import User
-        user = User.query.filter_by(email=email.data.lower()).first()
-        if not user:
+        if not User.email_exists(email.data):
             raise ValidationError('No account found with that email address.')
 
 
@@ -176,8 +185,7 @@ class ProfileUpdateForm(FlaskForm):
                 raise ValidationError(message)
             
             from ..models.user import User
-            user = User.query.filter_by(username=username.data).first()
-            if user:
+            if User.username_exists(username.data):
                 raise ValidationError('Username already exists.')
 
     def validate_email(self, email):
@@ -187,7 +195,11 @@ class ProfileUpdateForm(FlaskForm):
             if not is_valid:
                 raise ValidationError(message)
             
+            # Username is validated first (field order); if it already
+            # failed the form is rejected anyway, so skip the query
+            if self.username.errors:
+                return
+            
             from ..models.user import User
-            user = User.query.filter_by(email=email.data.lower()).first()
-            if user:
+            if User.email_exists(email.data):
                 raise ValidationError('Email already registered.')
\ No newline at end of file
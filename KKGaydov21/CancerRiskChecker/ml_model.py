@@ -1,11 +1,12 @@
 import os
 import pickle
+from threading import Lock
 import numpy as np
-import pandas as pd
-from sklearn.linear_model import LogisticRegression
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, classification_report
+
+
+# Upper probability bounds of each risk level but the last
+RISK_THRESHOLDS = np.array([0.3, 0.5, 0.7])
+RISK_LEVELS = np.array(["Very Low", "Low", "Moderate", "High"])
 
 
 class CancerRiskModel:
@@ -16,46 +17,89 @@ class CancerRiskModel:
             'radius_mean', 'texture_mean', 'perimeter_mean', 
             'area_mean', 'concave_points_mean', 'symmetry_mean'
         ]
+        # Fused weights as plain arrays; the older pickles are still read
+        self.weights_path = 'models/cancer_model_weights.npz'
+        self.artifacts_path = 'models/cancer_model_artifacts.pkl'
         self.model_path = 'models/cancer_model.pkl'
         self.scaler_path = 'models/scaler.pkl'
+        self._weights = None
+        self._bias = None
+        self._load_lock = Lock()
+    
+    def _fuse_coefficients(self):
+        """Fold the scaler into the logistic weights for the predict path.
+        
+        ((x - mean) / scale) @ coef + b == x @ (coef / scale) + (b - mean @ (coef / scale)),
+        so predicting needs one dot product and no sklearn input validation.
+        """
+        self._weights = self.model.coef_[0] / self.scaler.scale_
+        self._bias = float(self.model.intercept_[0] - self.scaler.mean_ @ self._weights)
         
     def load_model(self):
-        """Load the trained model and scaler"""
+        """Load the trained model and scaler.
+        
+        Never trains: that takes seconds and belongs to `python ml_model.py`,
+        not to whichever request happens to arrive first.
+        """
         try:
-            if os.path.exists(self.model_path) and os.path.exists(self.scaler_path):
+            if os.path.exists(self.weights_path):
+                # Raw float arrays: no sklearn objects to rebuild, no pickle
+                with np.load(self.weights_path, allow_pickle=False) as arrays:
+                    self._weights = arrays['weights']
+                    self._bias = float(arrays['bias'])
+                return True
+            elif os.path.exists(self.artifacts_path):
+                with open(self.artifacts_path, 'rb') as f:
+                    artifacts = pickle.load(f)
+                self.model, self.scaler = artifacts['model'], artifacts['scaler']
+            elif os.path.exists(self.model_path) and os.path.exists(self.scaler_path):
                 with open(self.model_path, 'rb') as f:
                     self.model = pickle.load(f)
                 with open(self.scaler_path, 'rb') as f:
                     self.scaler = pickle.load(f)
-                return True
             else:
-                return self.train_model()
+                print("No trained model found; run `python ml_model.py` to train one")
+                return False
+            self._fuse_coefficients()
+            return True
         except Exception as e:
             print(f"Error loading model: {e}")
             return False
     
+    def ensure_loaded(self):
+        """Load the model once per process, however many threads ask at once."""
+        if self._weights is None:
+            with self._load_lock:
+                if self._weights is None:
+                    return self.load_model()
+        return True
+    
     def train_model(self):
         """Train a new model with simplified features"""
+        # sklearn is only needed here; predicting uses the fused numpy weights
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.preprocessing import StandardScaler
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import accuracy_score
+        
         try:
             # Create synthetic training data based on medical knowledge
             # In production, you would use real medical data
-            np.random.seed(42)
+            rng = np.random.default_rng(42)
             n_samples = 1000
             
-            # Generate realistic cancer data
-            # Malignant samples (higher values)
-            malignant_data = np.random.normal([15, 20, 100, 800, 0.08, 0.2], 
-                                            [3, 4, 20, 200, 0.02, 0.03], 
-                                            (n_samples//2, 6))
+            # Generate realistic cancer data: malignant samples (higher
+            # values) in the first half, benign (lower values) in the second
+            means = np.array([[15, 20, 100, 800, 0.08, 0.2],
+                              [12, 17, 80, 600, 0.05, 0.18]])
+            stds = np.array([[3, 4, 20, 200, 0.02, 0.03],
+                             [2, 3, 15, 150, 0.015, 0.025]])
             
-            # Benign samples (lower values)
-            benign_data = np.random.normal([12, 17, 80, 600, 0.05, 0.18], 
-                                         [2, 3, 15, 150, 0.015, 0.025], 
-                                         (n_samples//2, 6))
-            
-            # Combine data
-            X = np.vstack([malignant_data, benign_data])
-            y = np.hstack([np.ones(n_samples//2), np.zeros(n_samples//2)])
+            # One draw for both classes, scaled per row by its class's parameters
+            X = rng.standard_normal((n_samples, 6))
+            X *= np.repeat(stds, n_samples // 2, axis=0)
+            X += np.repeat(means, n_samples // 2, axis=0)
+            y = np.repeat([1.0, 0.0], n_samples // 2)
             
             # Split data
             X_train, X_test, y_train, y_test = train_test_split(
@@ -70,6 +114,7 @@ class CancerRiskModel:
             # Train model
             self.model = LogisticRegression(random_state=42, max_iter=1000)
             self.model.fit(X_train_scaled, y_train)
+            self._fuse_coefficients()
             
             # Evaluate model
             y_pred = self.model.predict(X_test_scaled)
@@ -78,10 +123,7 @@ class CancerRiskModel:
             
             # Save model
             os.makedirs('models', exist_ok=True)
-            with open(self.model_path, 'wb') as f:
-                pickle.dump(self.model, f)
-            with open(self.scaler_path, 'wb') as f:
-                pickle.dump(self.scaler, f)
+            np.savez(self.weights_path, weights=self._weights, bias=self._bias)
             
             return True
             
@@ -89,43 +131,48 @@ class CancerRiskModel:
             print(f"Error training model: {e}")
             return False
     
-    def predict(self, features):
-        """Make a prediction on new data"""
-        if self.model is None or self.scaler is None:
-            if not self.load_model():
-                return None
+    def predict_batch(self, features_2d):
+        """Score an (N, 6) array of samples in one pass.
+        
+        Returns (probabilities, predictions, risk_levels) arrays, or None.
+        """
+        if not self.ensure_loaded():
+            return None
         
         try:
-            # Ensure features are in correct order
-            feature_array = np.array([features]).reshape(1, -1)
-            
-            # Scale features
-            feature_scaled = self.scaler.transform(feature_array)
+            logits = np.asarray(features_2d, dtype=np.float64) @ self._weights + self._bias
             
-            # Make prediction
-            probability = self.model.predict_proba(feature_scaled)[0][1]
-            prediction = self.model.predict(feature_scaled)[0]
+            # tanh form of the logistic function doesn't overflow for large |z|;
+            # the class follows from the same scores (p > 0.5 <=> z > 0)
+            probabilities = 0.5 * (1.0 + np.tanh(0.5 * logits))
+            predictions = (logits > 0).astype(int)
             
-            # Determine risk level
-            if probability < 0.3:
-                risk_level = "Very Low"
-            elif probability < 0.5:
-                risk_level = "Low"
-            elif probability < 0.7:
-                risk_level = "Moderate"
-            else:
-                risk_level = "High"
+            # side='right' so a probability equal to a threshold moves up a level
+            risk_levels = RISK_LEVELS[np.searchsorted(RISK_THRESHOLDS, probabilities, side='right')]
             
-            return {
-                'probability': float(probability),
-                'prediction': int(prediction),
-                'risk_level': risk_level
-            }
+            return probabilities, predictions, risk_levels
             
         except Exception as e:
             print(f"Error making prediction: {e}")
             return None
+    
+    def predict(self, features):
+        """Make a prediction on new data"""
+        result = self.predict_batch(np.asarray(features, dtype=np.float64).reshape(1, -1))
+        if result is None:
+            return None
+        
+        probabilities, predictions, risk_levels = result
+        return {
+            'probability': float(probabilities[0]),
+            'prediction': int(predictions[0]),
+            'risk_level': str(risk_levels[0])
+        }
 
 
 # Global model instance
 cancer_model = CancerRiskModel()
+
+
+if __name__ == '__main__':
+    cancer_model.train_model()
@@ -3,5 +3,6 @@ Database models package
 """
 from .user import User
 from .assessment import Assessment
+from .platform_stats import PlatformStats
 
-__all__ = ['User', 'Assessment']
\ No newline at end of file
+__all__ = ['User', 'Assessment', 'PlatformStats']
\ No newline at end of file
@@ -2,7 +2,48 @@
 Assessment model for storing cancer risk evaluations
 """
 from datetime import datetime
+from threading import Lock
+from cachetools import TTLCache
+from sqlalchemy import lambda_stmt, select
 from ..app import db
+from .functions import month_start
+
+
+# Platform-wide statistics; a few seconds of staleness is fine for them
+_statistics_cache = TTLCache(maxsize=1, ttl=30)
+_statistics_lock = Lock()
+
+# Per-risk-level display data, shared by every instance instead of
+# being rebuilt on each template access
+_RISK_COLORS = {
+    'Very Low': 'success',
+    'Low': 'primary',
+    'Moderate': 'warning',
+    'High': 'danger'
+}
+
+_RECOMMENDATIONS = {
+    'Very Low': {
+        'message': 'The analysis suggests a very low probability of malignancy.',
+        'advice': 'Continue regular health monitoring and follow your doctor\'s recommendations for routine screenings.',
+        'urgency': 'routine'
+    },
+    'Low': {
+        'message': 'The analysis suggests a low probability of malignancy.',
+        'advice': 'Maintain regular check-ups and discuss these results with your healthcare provider.',
+        'urgency': 'routine'
+    },
+    'Moderate': {
+        'message': 'The analysis suggests a moderate probability of malignancy.',
+        'advice': 'It is important to discuss these results with your healthcare provider for further evaluation and potential additional testing.',
+        'urgency': 'follow-up'
+    },
+    'High': {
+        'message': 'The analysis suggests a higher probability of malignancy.',
+        'advice': 'Please consult with your healthcare provider immediately for comprehensive evaluation and appropriate medical intervention.',
+        'urgency': 'immediate'
+    }
+}
 
 
 class Assessment(db.Model):
@@ -11,7 +52,8 @@ class Assessment(db.Model):
     __tablename__ = 'assessments'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    # No single-column index: ix_assessment_user_ts leads with user_id
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     
     # Input features (6 simplified measurements)
@@ -31,6 +73,20 @@ class Assessment(db.Model):
     model_version = db.Column(db.String(50), default='1.0', nullable=False)
     processing_time = db.Column(db.Float, nullable=True)  # Time taken for prediction
     
+    # Relationships
+    user = db.relationship('User', back_populates='assessments')
+    
+    # Per-user history is read newest first, and per-user risk breakdowns
+    # group by risk_level; both are served straight from these indexes
+    __table_args__ = (
+        db.Index('ix_assessment_user_ts', user_id, timestamp.desc()),
+        db.Index('ix_assessment_user_risk', user_id, risk_level),
+        db.Index(
+            'ix_assessment_user_month',
+            user_id, month_start(timestamp)
+        ).ddl_if(dialect='postgresql'),
+    )
+    
     @property
     def features_as_list(self):
         """Return input features as a list."""
@@ -56,39 +112,11 @@ class Assessment(db.Model):
     @property
     def risk_color(self):
         """Return Bootstrap color class for risk level."""
-        risk_colors = {
-            'Very Low': 'success',
-            'Low': 'primary',
-            'Moderate': 'warning',
-            'High': 'danger'
-        }
-        return risk_colors.get(self.risk_level, 'secondary')
+        return _RISK_COLORS.get(self.risk_level, 'secondary')
     
     def get_recommendations(self):
         """Get recommendations based on risk level."""
-        recommendations = {
-            'Very Low': {
-                'message': 'The analysis suggests a very low probability of malignancy.',
-                'advice': 'Continue regular health monitoring and follow your doctor\'s recommendations for routine screenings.',
-                'urgency': 'routine'
-            },
-            'Low': {
-                'message': 'The analysis suggests a low probability of malignancy.',
-                'advice': 'Maintain regular check-ups and discuss these results with your healthcare provider.',
-                'urgency': 'routine'
-            },
-            'Moderate': {
-                'message': 'The analysis suggests a moderate probability of malignancy.',
-                'advice': 'It is important to discuss these results with your healthcare provider for further evaluation and potential additional testing.',
-                'urgency': 'follow-up'
-            },
-            'High': {
-                'message': 'The analysis suggests a higher probability of malignancy.',
-                'advice': 'Please consult with your healthcare provider immediately for comprehensive evaluation and appropriate medical intervention.',
-                'urgency': 'immediate'
-            }
-        }
-        return recommendations.get(self.risk_level, recommendations['Low'])
+        return _RECOMMENDATIONS.get(self.risk_level, _RECOMMENDATIONS['Low'])
     
     def to_dict(self):
         """Convert assessment to dictionary."""
@@ -110,24 +138,58 @@ class Assessment(db.Model):
             'probability_percentage': self.probability_percentage
         }
     
+    @classmethod
+    def timestamp_month(cls):
+        """timestamp truncated to the month, as indexed by ix_assessment_user_month."""
+        return month_start(cls.timestamp)
+    
+    @staticmethod
+    def recent_for_user(user_id, limit=10):
+        """A user's assessments, newest first.
+        
+        Built with lambda_stmt so the statement is constructed and compiled
+        once; later calls only bind new values.
+        """
+        return db.session.execute(lambda_stmt(
+            lambda: select(Assessment)
+            .where(Assessment.user_id == user_id)
+            .order_by(Assessment.timestamp.desc(), Assessment.id.desc())
+            .limit(limit)
+        )).scalars().all()
+    
     @staticmethod
     def get_statistics():
-        """Get platform-wide assessment statistics."""
-        total = Assessment.query.count()
-        malignant = Assessment.query.filter_by(prediction_class=1).count()
-        benign = Assessment.query.filter_by(prediction_class=0).count()
+        """Get platform-wide assessment statistics.
+        
+        One GROUP BY risk level and class feeds every figure, and the result
+        is cached for 30 seconds.
+        """
+        with _statistics_lock:
+            statistics = _statistics_cache.get('statistics')
+        if statistics is not None:
+            return statistics
         
-        risk_distribution = db.session.query(
+        rows = db.session.query(
             Assessment.risk_level,
+            Assessment.prediction_class,
             db.func.count(Assessment.id).label('count')
-        ).group_by(Assessment.risk_level).all()
+        ).group_by(Assessment.risk_level, Assessment.prediction_class).all()
         
-        return {
-            'total_assessments': total,
-            'malignant_count': malignant,
-            'benign_count': benign,
-            'risk_distribution': {level: count for level, count in risk_distribution}
+        risk_distribution = {}
+        class_counts = {0: 0, 1: 0}
+        for risk_level, prediction_class, count in rows:
+            risk_distribution[risk_level] = risk_distribution.get(risk_level, 0) + count
+            class_counts[prediction_class] = class_counts.get(prediction_class, 0) + count
+        
+        statistics = {
+            'total_assessments': sum(class_counts.values()),
+            'malignant_count': class_counts[1],
+            'benign_count': class_counts[0],
+            'risk_distribution': risk_distribution
         }
+        with _statistics_lock:
+            _statistics_cache['statistics'] = statistics
+        return statistics
     
     def __repr__(self):
         return f'<Assessment {self.id} - {self.risk_level} ({self.prediction_text})>'
\ No newline at end of file
@@ -0,0 +1,28 @@
+"""
+Portable SQL functions shared by the models
+"""
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import DateTime
+
+
+class month_start(FunctionElement):
+    """A timestamp truncated to the first instant of its month.
+    
+    date_trunc('month', ts) on PostgreSQL, where the month indexes match it;
+    SQLite has no date_trunc, so it gets datetime(ts, 'start of month'),
+    which the DateTime result type parses back into a datetime.
+    """
+    type = DateTime()
+    name = 'month_start'
+    inherit_cache = True
+
+
+@compiles(month_start)
+def _month_start(element, compiler, **kw):
+    return "date_trunc('month', %s)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(month_start, 'sqlite')
+def _month_start_sqlite(element, compiler, **kw):
+    return "datetime(%s, 'start of month')" % compiler.process(element.clauses, **kw)
@@ -0,0 +1,45 @@
+"""
+Platform-wide counters kept in a single row
+"""
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from ..app import db
+
+
+class PlatformStats(db.Model):
+    """Single-row table of denormalized platform totals."""
+    
+    __tablename__ = 'platform_stats'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    total_assessments = db.Column(db.Integer, default=0, nullable=False)
+    
+    @classmethod
+    def ensure_row(cls):
+        """Create the stats row, seeded from the assessments table, if missing."""
+        from .assessment import Assessment
+        if db.session.get(cls, 1) is None:
+            total = db.session.scalar(select(func.count(Assessment.id)))
+            db.session.add(cls(id=1, total_assessments=total))
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # Another worker seeded it first
+                db.session.rollback()
+    
+    @classmethod
+    def adjust_assessments(cls, delta):
+        """Add delta to the assessment total with one UPDATE, in the caller's transaction."""
+        db.session.execute(
+            update(cls)
+            .where(cls.id == 1)
+            .values(total_assessments=cls.total_assessments + delta)
+        )
+    
+    @classmethod
+    def get_total_assessments(cls):
+        """Read the assessment total by primary key."""
+        return db.session.scalar(select(cls.total_assessments).where(cls.id == 1)) or 0
+    
+    def __repr__(self):
+        return f'<PlatformStats assessments={self.total_assessments}>'
@@ -2,9 +2,38 @@
 User model for authentication and profile management
 """
 from datetime import datetime
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from flask import g, has_request_context
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import DDL, event, exists, lambda_stmt, literal_column, or_, select, update
+from sqlalchemy.orm import validates
+from werkzeug.security import check_password_hash
 from ..app import db
+from .functions import month_start
+
+try:
+    from gevent import get_hub
+    from gevent.monkey import is_module_patched
+except ImportError:  # gevent is only needed under the production server
+    get_hub = is_module_patched = None
+
+
+# Argon2id for new hashes. Werkzeug pbkdf2/scrypt hashes from before the
+# switch still verify, and are replaced on the next successful login.
+_password_hasher = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=1)
+
+
+def _hash_off_hub(func, *args):
+    """Run a password hash call without stalling other greenlets.
+    
+    Under gevent the call goes to the hub's native thread pool; argon2 and
+    hashlib's scrypt and pbkdf2 release the GIL, so other requests keep
+    running meanwhile. Elsewhere it simply runs inline.
+    """
+    if is_module_patched is not None and is_module_patched('threading'):
+        return get_hub().threadpool.apply(func, args)
+    return func(*args)
 
 
 class User(UserMixin, db.Model):
@@ -30,41 +59,137 @@ class User(UserMixin, db.Model):
     is_admin = db.Column(db.Boolean, default=False, nullable=False)
     
     # Relationships
-    assessments = db.relationship('Assessment', backref='user', lazy='dynamic', 
+    assessments = db.relationship('Assessment', back_populates='user',
                                 cascade='all, delete-orphan')
     
+    # created_at serves the 7/30/90-day growth counts; on PostgreSQL the month
+    # expression index lets monthly registrations be grouped off the index.
+    # Admins are a handful of rows, so their index is partial where supported
+    __table_args__ = (
+        db.Index('ix_user_created_at', created_at),
+        db.Index(
+            'ix_user_is_admin', is_admin,
+            postgresql_where=is_admin, sqlite_where=is_admin
+        ),
+        db.Index(
+            'ix_user_created_month',
+            month_start(created_at)
+        ).ddl_if(dialect='postgresql'),
+    )
+    
+    @validates('email')
+    def _normalize_email(self, key, email):
+        """Store emails lowercased so equality lookups on the plain unique index match."""
+        return email.lower() if email else email
+    
     def set_password(self, password):
         """Hash and set user password."""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = _hash_off_hub(_password_hasher.hash, password)
     
     def check_password(self, password):
-        """Check if provided password matches hash."""
-        return check_password_hash(self.password_hash, password)
+        """Check if provided password matches hash.
+        
+        A matching werkzeug or outdated argon2 hash is replaced with a fresh
+        one; the caller's next commit (update_last_login on login) saves it.
+        """
+        if not self.password_hash.startswith('$argon2'):
+            if not _hash_off_hub(check_password_hash, self.password_hash, password):
+                return False
+            self.set_password(password)
+            return True
+        
+        try:
+            _hash_off_hub(_password_hasher.verify, self.password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+        if _password_hasher.check_needs_rehash(self.password_hash):
+            self.set_password(password)
+        return True
     
     def update_last_login(self):
         """Update last login timestamp."""
         self.last_login = datetime.utcnow()
         db.session.commit()
     
-    def increment_assessments(self):
-        """Increment total assessments count."""
-        self.total_assessments += 1
-        self.last_assessment = datetime.utcnow()
-        db.session.commit()
+    @classmethod
+    def increment_assessments(cls, user_id, count=1, timestamp=None):
+        """Add count assessments to a user's total with one UPDATE, in the caller's transaction."""
+        db.session.execute(
+            update(cls)
+            .where(cls.id == user_id)
+            .values(
+                total_assessments=cls.total_assessments + count,
+                last_assessment=timestamp or datetime.utcnow()
+            )
+        )
+    
+    @classmethod
+    def decrement_assessments(cls, user_id):
+        """Decrement a user's assessment count with one UPDATE, no SELECT."""
+        db.session.execute(
+            update(cls)
+            .where(cls.id == user_id, cls.total_assessments > 0)
+            .values(total_assessments=cls.total_assessments - 1)
+        )
+    
+    def _request_memo(self, key, load):
+        """Memoize a query result for the rest of the current request.
+        
+        Kept on flask.g, which lives exactly as long as the request, so
+        results never outlive it and need no invalidation.
+        """
+        if not has_request_context():
+            return load()
+        memo = g.setdefault('_user_query_memo', {})
+        key = (self.id,) + key
+        if key not in memo:
+            memo[key] = load()
+        return memo[key]
     
     def get_recent_assessments(self, limit=10):
         """Get user's recent assessments."""
-        return self.assessments.order_by(
-            db.desc('timestamp')
-        ).limit(limit).all()
+        from ..models.assessment import Assessment
+        return self._request_memo(
+            ('recent', limit), lambda: Assessment.recent_for_user(self.id, limit=limit)
+        )
+    
+    @staticmethod
+    def find_by_login(login):
+        """Find a user by username or email, through a cached lambda statement."""
+        email = login.lower()
+        return db.session.execute(lambda_stmt(
+            lambda: select(User).where(or_(User.username == login, User.email == email))
+        )).scalars().first()
+    
+    @staticmethod
+    def username_exists(username):
+        """Whether a username is taken, via SELECT EXISTS; no row is loaded."""
+        return db.session.execute(lambda_stmt(
+            lambda: select(exists().where(User.username == username))
+        )).scalar()
+    
+    @staticmethod
+    def admin_exists():
+        """Whether any admin account exists, via SELECT EXISTS on the admin index."""
+        return db.session.execute(lambda_stmt(
+            lambda: select(exists().where(User.is_admin))
+        )).scalar()
+    
+    @staticmethod
+    def email_exists(email):
+        """Whether an email (compared lowercased, as stored) is taken."""
+        email = email.lower()
+        return db.session.execute(lambda_stmt(
+            lambda: select(exists().where(User.email == email))
+        )).scalar()
     
     def get_risk_distribution(self):
         """Get distribution of risk levels for user."""
         from ..models.assessment import Assessment
-        return db.session.query(
+        return self._request_memo(('risk_distribution',), lambda: db.session.query(
             Assessment.risk_level,
             db.func.count(Assessment.id).label('count')
-        ).filter_by(user_id=self.id).group_by(Assessment.risk_level).all()
+        ).filter_by(user_id=self.id).group_by(Assessment.risk_level).all())
     
     def to_dict(self):
         """Convert user to dictionary."""
@@ -78,5 +203,29 @@ class User(UserMixin, db.Model):
             'last_assessment': self.last_assessment.isoformat() if self.last_assessment else None
         }
     
+    @classmethod
+    def created_month(cls):
+        """created_at truncated to the month, as indexed by ix_user_created_month."""
+        return month_start(cls.created_at)
+    
+    @classmethod
+    def search_text(cls):
+        """Username, email and full name as one string, as indexed by ix_user_search_trgm."""
+        sep = literal_column("' '")
+        return cls.username + sep + cls.email + sep + db.func.coalesce(cls.full_name, literal_column("''"))
+    
     def __repr__(self):
-        return f'<User {self.username}>'
\ No newline at end of file
+        return f'<User {self.username}>'
+
+
+# On PostgreSQL, a pg_trgm GIN index over User.search_text() lets the admin
+# search's ILIKE '%term%' use an index instead of scanning every user
+event.listen(
+    User.__table__,
+    'after_create',
+    DDL(
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm;"
+        "CREATE INDEX IF NOT EXISTS ix_user_search_trgm ON users USING gin "
+        "((username || ' ' || email || ' ' || coalesce(full_name, '')) gin_trgm_ops)"
+    ).execute_if(dialect='postgresql')
+)
\ No newline at end of file
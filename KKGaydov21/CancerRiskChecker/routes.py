@@ -1,7 +1,9 @@
 from CancerRiskChecker.app import app
 from flask import render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
+from sqlalchemy.orm import raiseload
 from datetime import datetime
+from functools import lru_cache
 import json
 import plotly.graph_objects as go
 import plotly.utils
@@ -9,6 +11,7 @@ from app import app, db
 from models import User, Assessment
 from forms.assessment_forms import AssessmentForm
 from ml_model import cancer_model
+from utils.helpers import keyset_paginate
 
 
 @app.route('/')
@@ -23,15 +26,15 @@ def index():
 def dashboard():
     # Get user's recent assessments
     recent_assessments = Assessment.query.filter_by(user_id=current_user.id)\
+        .options(raiseload('*'))\
         .order_by(Assessment.timestamp.desc()).limit(10).all()
     
-    # Get statistics
-    total_assessments = Assessment.query.filter_by(user_id=current_user.id).count()
-    
+    # Get statistics; the total is the sum of the per-level counts
     risk_distribution = db.session.query(
         Assessment.risk_level,
         db.func.count(Assessment.id).label('count')
     ).filter_by(user_id=current_user.id).group_by(Assessment.risk_level).all()
+    total_assessments = sum(count for _, count in risk_distribution)
     
     return render_template('dashboard.html', 
                          recent_assessments=recent_assessments,
@@ -88,15 +91,12 @@ def assessment():
     return render_template('assessment.html', form=form)
 
 
-@app.route('/result/<int:assessment_id>')
-@login_required
-def result(assessment_id):
-    assessment = Assessment.query.filter_by(id=assessment_id, user_id=current_user.id).first_or_404()
-    
-    # Create gauge chart
+@lru_cache(maxsize=1024)
+def _gauge_json(percentage):
+    """Serialized gauge figure for a percentage rounded to 0.1, built once per value."""
     fig = go.Figure(go.Indicator(
         mode="gauge+number+delta",
-        value=assessment.prediction_probability * 100,
+        value=percentage,
         domain={'x': [0, 1], 'y': [0, 1]},
         title={'text': "Malignancy Risk (%)", 'font': {'size': 24, 'color': '#2d3748'}},
         delta={'reference': 50, 'increasing': {'color': "red"}, 'decreasing': {'color': "green"}},
@@ -124,7 +124,15 @@ def result(assessment_id):
         font={'color': "#2d3748", 'family': "Arial"}
     )
     
-    gauge_json = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+    return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+
+
+@app.route('/result/<int:assessment_id>')
+@login_required
+def result(assessment_id):
+    assessment = Assessment.query.filter_by(id=assessment_id, user_id=current_user.id).first_or_404()
+    
+    gauge_json = _gauge_json(round(assessment.prediction_probability * 100, 1))
     
     return render_template('result.html', assessment=assessment, gauge_chart=gauge_json)
 
@@ -132,12 +140,13 @@ def result(assessment_id):
 @app.route('/history')
 @login_required
 def history():
-    page = request.args.get('page', 1, type=int)
-    assessments = Assessment.query.filter_by(user_id=current_user.id)\
-        .order_by(Assessment.timestamp.desc())\
-        .paginate(page=page, per_page=20, error_out=False)
+    cursor = request.args.get('cursor')
+    query = Assessment.query.filter_by(user_id=current_user.id)\
+        .options(raiseload('*'))
+    assessments = keyset_paginate(query, Assessment.timestamp, Assessment.id,
+                                  cursor, per_page=20)
     
-    return render_template('history.html', assessments=assessments)
+    return render_template('history.html', assessments=assessments, cursor=cursor)
 
 
 @app.errorhandler(404)
@@ -9,7 +9,7 @@ def create_initial_admin():
     """Create initial admin user if none exists."""
     try:
         # Check if any admin users exist
-        existing_admin = User.query.filter_by(is_admin=True).first()
+        existing_admin = User.query.filter(User.is_admin).first()
         
         if not existing_admin:
             # Create default admin user
@@ -46,12 +46,10 @@ def setup_admin_permissions():
     """Set up admin permissions and roles."""
     try:
         # Ensure at least one admin exists
-        admin_count = User.query.filter_by(is_admin=True).count()
-        
-        if admin_count == 0:
+        if not User.admin_exists():
             return create_initial_admin()
         
-        print(f"Found {admin_count} admin user(s)")
+        print("Admin user(s) found")
         return True
         
     except Exception as e:
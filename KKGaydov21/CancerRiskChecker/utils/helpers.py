@@ -2,14 +2,34 @@
 Helper functions and utilities
 """
 import json
+import logging
+import base64
+import re
+import orjson
+from collections import namedtuple
 from datetime import datetime, timedelta
-from functools import wraps
-from flask import flash, request, jsonify
+from functools import lru_cache, wraps
+from html.parser import HTMLParser
+from flask import Response, flash, request, jsonify
 from flask_login import current_user
+from sqlalchemy import tuple_
 import plotly.graph_objects as go
 import plotly.utils
 
 
+log = logging.getLogger(__name__)
+
+# Naive datetimes are UTC throughout the app; numpy scalars come from the model
+ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+
+_NEWLINE_RE = re.compile('\n')
+
+
+def fast_json(obj):
+    """Build a JSON response with orjson instead of jsonify's stdlib encoder."""
+    return Response(orjson.dumps(obj, option=ORJSON_OPTIONS), mimetype='application/json')
+
+
 def login_required_json(f):
     """Decorator for API endpoints requiring authentication."""
     @wraps(f)
@@ -38,8 +58,12 @@ def flash_errors(form):
             flash(f"{getattr(form, field).label.text}: {error}", 'error')
 
 
+@lru_cache(maxsize=512)
 def create_gauge_chart(probability, title="Risk Probability"):
-    """Create a Plotly gauge chart for risk visualization."""
+    """Create a Plotly gauge chart for risk visualization.
+    
+    Memoized on its arguments, so round the probability before calling.
+    """
     fig = go.Figure(go.Indicator(
         mode="gauge+number+delta",
         value=probability * 100,
@@ -168,13 +192,60 @@ def get_risk_color_class(risk_level):
     return colors.get(risk_level, 'secondary')
 
 
+class _MarkupFinder(HTMLParser):
+    """Record where each tag, comment or declaration sits in an HTML fragment.
+    
+    Text handlers are left as no-ops: the text itself is sliced from the
+    source, so entities and stray '&' come out exactly as written.
+    """
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.spans = []
+        self._start = None
+    
+    def _markup(self, *args):
+        self._start = self.getpos()
+    
+    handle_starttag = handle_endtag = handle_comment = _markup
+    handle_decl = handle_pi = unknown_decl = _markup
+    
+    def updatepos(self, i, j):
+        # Called once per token after its handler, with the token's end
+        j = super().updatepos(i, j)
+        if self._start is not None:
+            self.spans.append((self._start, self.getpos()))
+            self._start = None
+        return j
+
+
+def strip_tags(text):
+    """Remove HTML tags and comments from text in one linear pass.
+    
+    >>> strip_tags('<b>R&D</b> at AT&T inc, a &amp b &#60')
+    'R&D at AT&T inc, a &amp b &#60'
+    >>> strip_tags('<a href="x>y">fish & chips</a><!-- c -->')
+    'fish & chips'
+    """
+    parser = _MarkupFinder()
+    parser.feed(text)
+    parser.close()
+    
+    # getpos() is (line, column); map it back to an offset into text
+    line_starts = [0] + [m.end() for m in _NEWLINE_RE.finditer(text)]
+    parts = []
+    pos = 0
+    for (start_line, start_col), (end_line, end_col) in parser.spans:
+        parts.append(text[pos:line_starts[start_line - 1] + start_col])
+        pos = line_starts[end_line - 1] + end_col
+    parts.append(text[pos:])
+    return ''.join(parts)
+
+
 def sanitize_input(data):
     """Sanitize user input data."""
     if isinstance(data, str):
-        # Basic HTML tag removal
-        import re
-        data = re.sub(r'<[^>]+>', '', data)
-        data = data.strip()
+        data = strip_tags(data).strip()
     elif isinstance(data, dict):
         data = {k: sanitize_input(v) for k, v in data.items()}
     elif isinstance(data, list):
@@ -193,7 +264,7 @@ def log_user_activity(activity, details=None):
     """Log user activity for audit purposes."""
     if current_user.is_authenticated:
         # In a production app, you might want to store this in a separate table
-        print(f"User {current_user.username} - {activity}: {details}")
+        log.info("User %s - %s: %s", current_user.username, activity, details)
 
 
 def validate_file_upload(file, allowed_extensions=None, max_size_mb=5):
@@ -232,6 +303,57 @@ def paginate_query(query, page, per_page=20):
     )
 
 
+class KeysetPage(namedtuple('KeysetPage', ['items', 'next_cursor'])):
+    """One page of keyset-paginated results."""
+    __slots__ = ()
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def encode_cursor(timestamp, row_id):
+    """Encode the sort key of a page's last row as an opaque URL-safe cursor."""
+    payload = json.dumps([timestamp.isoformat(), row_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Decode a cursor from encode_cursor; returns None if missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def keyset_paginate(query, order_col, id_col, cursor=None, per_page=20, key=None):
+    """Paginate newest-first on (order_col, id_col) without OFFSET or COUNT(*).
+
+    Rows after ``cursor`` are found with an index range condition, and one
+    extra row is fetched to tell whether a next page exists. ``key`` maps a
+    result row to its (order value, id) pair when rows are not plain entities.
+    """
+    after = decode_cursor(cursor)
+    if after is not None:
+        query = query.filter(tuple_(order_col, id_col) < after)
+
+    rows = query.order_by(order_col.desc(), id_col.desc()).limit(per_page + 1).all()
+    items = rows[:per_page]
+
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        if key is not None:
+            next_cursor = encode_cursor(*key(last))
+        else:
+            next_cursor = encode_cursor(getattr(last, order_col.key), getattr(last, id_col.key))
+
+    return KeysetPage(items, next_cursor)
+
+
 def get_client_ip():
     """Get client IP address."""
     if request.environ.get('HTTP_X_FORWARDED_FOR') is None:
@@ -2,7 +2,10 @@
 Machine learning engine for cancer risk prediction
 """
 import os
+import math
+import logging
 import pickle
+from bisect import bisect_right
 import numpy as np
 import pandas as pd
 from sklearn.linear_model import LogisticRegression
@@ -12,21 +15,67 @@ from sklearn.metrics import accuracy_score, classification_report, roc_auc_score
 from datetime import datetime
 
 
+log = logging.getLogger(__name__)
+
+# Model inputs, in the order the model and scaler expect them
+FEATURE_NAMES = (
+    'radius_mean', 'texture_mean', 'perimeter_mean',
+    'area_mean', 'concave_points_mean', 'symmetry_mean'
+)
+FEATURE_SET = frozenset(FEATURE_NAMES)
+
+# Valid range of each input feature, in FEATURE_NAMES order
+FEATURE_MIN = np.array([6.0, 9.0, 40.0, 140.0, 0.0, 0.1])
+FEATURE_MAX = np.array([30.0, 40.0, 200.0, 2500.0, 0.2, 0.3])
+
+# Upper probability bound of each risk level but the last
+RISK_THRESHOLDS = (0.25, 0.45, 0.70)
+RISK_LEVELS = ('Very Low', 'Low', 'Moderate', 'High')
+_RISK_LEVEL_ARRAY = np.array(RISK_LEVELS, dtype=object)
+
+
+def features_from_mapping(data):
+    """Read the model inputs from a request payload; missing keys become NaN."""
+    return np.fromiter(
+        (data.get(name, np.nan) for name in FEATURE_NAMES),
+        dtype=np.float64, count=len(FEATURE_NAMES)
+    )
+
+
+def _validate(features):
+    """Return the index of the first invalid feature, or -1 if all are valid."""
+    bad = ~np.isfinite(features) | (features < FEATURE_MIN) | (features > FEATURE_MAX)
+    return int(np.argmax(bad)) if bad.any() else -1
+
+
+def _logit(features, weights, bias):
+    """Linear score of one feature vector."""
+    return float(np.dot(features, weights)) + bias
+
+
+def _sigmoid(z):
+    """Numerically stable logistic function on a plain float."""
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
 class CancerRiskPredictor:
     """Advanced ML model for cancer risk prediction."""
     
     def __init__(self, model_dir='models'):
         self.model = None
         self.scaler = None
-        self.feature_names = [
-            'radius_mean', 'texture_mean', 'perimeter_mean', 
-            'area_mean', 'concave_points_mean', 'symmetry_mean'
-        ]
+        self.feature_names = list(FEATURE_NAMES)
         self.model_dir = model_dir
         self.model_path = os.path.join(model_dir, 'cancer_model.pkl')
         self.scaler_path = os.path.join(model_dir, 'scaler.pkl')
         self.metadata_path = os.path.join(model_dir, 'model_metadata.pkl')
         self.version = '2.0'
+        self._feature_importance = None
+        self._weights = None
+        self._bias = None
         
         # Ensure model directory exists
         os.makedirs(model_dir, exist_ok=True)
@@ -39,6 +88,8 @@ class CancerRiskPredictor:
                     self.model = pickle.load(f)
                 with open(self.scaler_path, 'rb') as f:
                     self.scaler = pickle.load(f)
+                self._feature_importance = None
+                self._fuse_coefficients()
                 
                 # Load metadata if available
                 if os.path.exists(self.metadata_path):
@@ -55,6 +106,26 @@ class CancerRiskPredictor:
             print(f"Error loading model: {e}")
             return self.train_model()
     
+    def _fuse_coefficients(self):
+        """Fold the scaler into the logistic weights for the predict paths.
+        
+        ((x - mean) / scale) @ coef + b == x @ (coef / scale) + (b - mean @ (coef / scale)),
+        so scoring needs one dot product and no per-call scaling.
+        """
+        self._weights = self.model.coef_[0] / self.scaler.scale_
+        self._bias = float(self.model.intercept_[0] - self.scaler.mean_ @ self._weights)
+    
+    def ensure_loaded(self):
+        """Load the model only if it isn't in memory yet."""
+        if self._weights is None:
+            return self.load_model()
+        return True
+    
+    def warm_up(self):
+        """Load the model and run one prediction so the first request doesn't pay for either."""
+        if self.ensure_loaded():
+            self.predict((FEATURE_MIN + FEATURE_MAX) / 2)
+    
     def _model_files_exist(self):
         """Check if all required model files exist."""
         return (os.path.exists(self.model_path) and 
@@ -86,6 +157,8 @@ class CancerRiskPredictor:
                 class_weight='balanced'
             )
             self.model.fit(X_train_scaled, y_train)
+            self._feature_importance = None
+            self._fuse_coefficients()
             
             # Evaluate model
             y_pred = self.model.predict(X_test_scaled)
@@ -175,7 +248,7 @@ class CancerRiskPredictor:
     
     def predict(self, features):
         """Make a prediction on new data."""
-        if self.model is None or self.scaler is None:
+        if self._weights is None:
             if not self.load_model():
                 return None
         
@@ -184,15 +257,14 @@ class CancerRiskPredictor:
             if len(features) != 6:
                 raise ValueError(f"Expected 6 features, got {len(features)}")
             
-            # Convert to numpy array and reshape
-            feature_array = np.array([features]).reshape(1, -1)
-            
-            # Scale features
-            feature_scaled = self.scaler.transform(feature_array)
+            # Score with the scaler folded into the weights; sklearn's
+            # transform/predict_proba re-validate their input on every call
+            feature_array = np.asarray(features, dtype=np.float64)
             
             # Make prediction
-            probability = self.model.predict_proba(feature_scaled)[0][1]
-            prediction = self.model.predict(feature_scaled)[0]
+            z = _logit(feature_array, self._weights, self._bias)
+            probability = _sigmoid(z)
+            prediction = int(z > 0)
             
             # Determine risk level with improved thresholds
             risk_level = self._calculate_risk_level(probability)
@@ -205,20 +277,47 @@ class CancerRiskPredictor:
                 'confidence': self._calculate_confidence(probability)
             }
             
-        except Exception as e:
-            print(f"Error making prediction: {e}")
+        except Exception:
+            log.exception("Error making prediction")
+            return None
+    
+    def predict_batch(self, features):
+        """Score a (n, 6) batch of feature vectors with one matrix product.
+        
+        Returns one result dict per row, shaped like predict()'s, or None
+        if the model can't be loaded or the input can't be scored.
+        """
+        if not self.ensure_loaded():
+            return None
+        
+        try:
+            feature_matrix = np.asarray(features, dtype=np.float64).reshape(-1, len(FEATURE_NAMES))
+            z = feature_matrix @ self._weights + self._bias
+            # tanh form of the logistic function doesn't overflow for large |z|
+            probabilities = 0.5 * (1.0 + np.tanh(0.5 * z))
+            confidences = np.round(2 * np.abs(probabilities - 0.5), 3)
+            risk_levels = _RISK_LEVEL_ARRAY[np.searchsorted(RISK_THRESHOLDS, probabilities, side='right')]
+            
+            return [
+                {
+                    'probability': probability,
+                    'prediction': int(score > 0),
+                    'risk_level': risk_level,
+                    'model_version': self.version,
+                    'confidence': confidence
+                }
+                for probability, score, risk_level, confidence in zip(
+                    probabilities.tolist(), z.tolist(), risk_levels.tolist(), confidences.tolist()
+                )
+            ]
+            
+        except Exception:
+            log.exception("Error making batch prediction")
             return None
     
     def _calculate_risk_level(self, probability):
         """Calculate risk level based on probability with improved thresholds."""
-        if probability < 0.25:
-            return "Very Low"
-        elif probability < 0.45:
-            return "Low"
-        elif probability < 0.70:
-            return "Moderate"
-        else:
-            return "High"
+        return RISK_LEVELS[bisect_right(RISK_THRESHOLDS, probability)]
     
     def _calculate_confidence(self, probability):
         """Calculate prediction confidence."""
@@ -231,12 +330,13 @@ class CancerRiskPredictor:
         if self.model is None:
             return None
         
-        if hasattr(self.model, 'coef_'):
+        # Weights are fixed once loaded, so rank them only once
+        if self._feature_importance is None and hasattr(self.model, 'coef_'):
             importance = abs(self.model.coef_[0])
             feature_importance = dict(zip(self.feature_names, importance))
-            return sorted(feature_importance.items(), key=lambda x: x[1], reverse=True)
+            self._feature_importance = sorted(feature_importance.items(), key=lambda x: x[1], reverse=True)
         
-        return None
+        return self._feature_importance
     
     def validate_input(self, features):
         """Validate input features."""
@@ -246,19 +346,15 @@ class CancerRiskPredictor:
         if len(features) != 6:
             return False, f"Expected 6 features, got {len(features)}"
         
-        # Check ranges
-        ranges = [
-            (6.0, 30.0),    # radius_mean
-            (9.0, 40.0),    # texture_mean
-            (40.0, 200.0),  # perimeter_mean
-            (140.0, 2500.0), # area_mean
-            (0.0, 0.2),     # concave_points_mean
-            (0.1, 0.3)      # symmetry_mean
-        ]
+        try:
+            feature_array = np.asarray(features, dtype=np.float64)
+        except (TypeError, ValueError):
+            return False, "Features must be numeric"
         
-        for i, (value, (min_val, max_val)) in enumerate(zip(features, ranges)):
-            if not (min_val <= value <= max_val):
-                return False, f"{self.feature_names[i]} must be between {min_val} and {max_val}"
+        # Check ranges
+        i = _validate(feature_array)
+        if i >= 0:
+            return False, f"{self.feature_names[i]} must be between {FEATURE_MIN[i]} and {FEATURE_MAX[i]}"
         
         return True, "Valid input"
 
@@ -5,6 +5,15 @@ from wtforms.validators import ValidationError
 import re
 
 
+# Compiled once at import; the validators run on every form submit
+_UPPERCASE_RE = re.compile(r'[A-Z]')
+_LOWERCASE_RE = re.compile(r'[a-z]')
+_DIGIT_RE = re.compile(r'\d')
+_SPECIAL_RE = re.compile(r'[!@#$%^&*(),.?":{}|<>]')
+_USERNAME_RE = re.compile(r'[a-zA-Z0-9_.-]+')
+_EMAIL_RE = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+
 class StrongPassword:
     """Validator for strong password requirements."""
     
@@ -20,16 +29,16 @@ class StrongPassword:
         if len(password) < 8:
             raise ValidationError('Password must be at least 8 characters long.')
         
-        if not re.search(r'[A-Z]', password):
+        if not _UPPERCASE_RE.search(password):
             raise ValidationError('Password must contain at least one uppercase letter.')
         
-        if not re.search(r'[a-z]', password):
+        if not _LOWERCASE_RE.search(password):
             raise ValidationError('Password must contain at least one lowercase letter.')
         
-        if not re.search(r'\d', password):
+        if not _DIGIT_RE.search(password):
             raise ValidationError('Password must contain at least one number.')
         
-        if not re.search(r'[!@#$%^&*(),.?":{}|<>]', password):
+        if not _SPECIAL_RE.search(password):
             raise ValidationError('Password must contain at least one special character.')
 
 
@@ -78,7 +87,7 @@ def validate_username(username):
     if len(username) > 64:
         return False, "Username must be less than 64 characters"
     
-    if not re.match(r'^[a-zA-Z0-9_.-]+$', username):
+    if not _USERNAME_RE.fullmatch(username):
         return False, "Username can only contain letters, numbers, dots, hyphens, and underscores"
     
     return True, "Valid username"
@@ -86,9 +95,7 @@ def validate_username(username):
 
 def validate_email(email):
     """Validate email format."""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    
-    if not re.match(pattern, email):
+    if not _EMAIL_RE.fullmatch(email):
         return False, "Invalid email format"
     
     if len(email) > 120:
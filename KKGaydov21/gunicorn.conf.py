@@ -0,0 +1,22 @@
+"""
+Gunicorn settings for production: gunicorn -c gunicorn.conf.py run:app
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+
+# Processes for the CPU-bound routes (password hashing, predictions),
+# gevent inside each so DB round trips don't block the worker
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gevent'
+# ProductionConfig's pool_size + max_overflow; more greenlets than that
+# would only queue for a database connection
+worker_connections = 60
+
+
+def post_fork(server, worker):
+    # psycopg2 talks to the server through libpq, which monkey-patching can't
+    # reach; the wait callback lets other greenlets run while a query is out
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()